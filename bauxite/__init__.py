@@ -1,70 +1,158 @@
+from .codec import JSONCodec, OrjsonCodec, StdlibJSONCodec, UjsonCodec
 from .constants import API_URL, VERSION
 from .error import BauxiteError
 from .gateway import (
+    CallbackRegistry,
+    Cluster,
+    DispatchPipeline,
     EventDirection,
+    FileSessionStore,
     GatewayClient,
     GatewayCloseCodes,
     GatewayCriticalError,
     GatewayOps,
     GatewayRateLimiter,
     GatewayReconnect,
+    HeartbeatScheduler,
+    IPCGatewayRateLimiter,
+    LazyPayload,
     LocalGatewayRateLimiter,
+    MemberChunker,
+    OutboundScheduler,
+    OverflowPolicy,
+    PipelineConfig,
+    PipelineStats,
+    SessionSnapshot,
+    SessionStore,
     Shard,
     ShardStatus,
 )
 from .http import (
+    AUDIT_LOG_BEFORE,
+    BANS_AFTER,
+    BANS_BEFORE,
+    MEMBERS_AFTER,
+    MESSAGES_AFTER,
+    MESSAGES_BEFORE,
     BadGateway,
     BadRequest,
     BucketLock,
+    BucketTableStats,
+    BulkResult,
+    CacheConfig,
+    CacheStats,
+    Cursor,
     File,
     Forbidden,
     GatewayTimeout,
+    GlobalLimiterStats,
+    GlobalRateLimiter,
     HTTPClient,
     HTTPError,
+    IPCBucketLock,
+    IPCRateLimiter,
+    JSONLinesSink,
     LocalBucketLock,
+    LocalGlobalRateLimiter,
     LocalRateLimiter,
     MethodNotAllowed,
     NotFound,
+    PoolConfig,
+    PoolStats,
     RateLimiter,
+    RateLimitServer,
+    RequestSpan,
+    RequestSpec,
+    RequestTracer,
+    ResponseCache,
     Route,
     ServerError,
     ServiceUnavailable,
+    TokenBucketLock,
+    TokenBucketRateLimiter,
     TooManyRequests,
     Unauthorized,
     UnprocessableEntity,
 )
+from .metrics import MetricsRegistry, MetricsServer
 
 __all__ = (
     "API_URL",
     "VERSION",
+    "AUDIT_LOG_BEFORE",
+    "BANS_AFTER",
+    "BANS_BEFORE",
+    "MEMBERS_AFTER",
+    "MESSAGES_AFTER",
+    "MESSAGES_BEFORE",
     "BadGateway",
     "BadRequest",
     "BauxiteError",
     "BucketLock",
+    "BucketTableStats",
+    "BulkResult",
+    "CacheConfig",
+    "CacheStats",
+    "Cursor",
     "Forbidden",
     "GatewayTimeout",
+    "GlobalLimiterStats",
+    "GlobalRateLimiter",
     "HTTPClient",
     "HTTPError",
+    "IPCBucketLock",
+    "IPCRateLimiter",
+    "JSONCodec",
+    "JSONLinesSink",
     "LocalBucketLock",
+    "LocalGlobalRateLimiter",
     "LocalRateLimiter",
     "MethodNotAllowed",
+    "MetricsRegistry",
+    "MetricsServer",
     "NotFound",
+    "OrjsonCodec",
+    "PoolConfig",
+    "PoolStats",
     "RateLimiter",
+    "RateLimitServer",
+    "RequestSpan",
+    "RequestSpec",
+    "RequestTracer",
+    "ResponseCache",
     "Route",
     "ServerError",
     "ServiceUnavailable",
+    "StdlibJSONCodec",
+    "TokenBucketLock",
+    "TokenBucketRateLimiter",
     "TooManyRequests",
+    "UjsonCodec",
     "Unauthorized",
     "UnprocessableEntity",
     "File",
+    "CallbackRegistry",
+    "Cluster",
+    "DispatchPipeline",
     "EventDirection",
+    "FileSessionStore",
     "GatewayClient",
     "GatewayCloseCodes",
     "GatewayCriticalError",
     "GatewayOps",
     "GatewayRateLimiter",
     "GatewayReconnect",
+    "HeartbeatScheduler",
+    "IPCGatewayRateLimiter",
+    "LazyPayload",
     "LocalGatewayRateLimiter",
+    "MemberChunker",
+    "OutboundScheduler",
+    "OverflowPolicy",
+    "PipelineConfig",
+    "PipelineStats",
+    "SessionSnapshot",
+    "SessionStore",
     "Shard",
     "ShardStatus",
 )
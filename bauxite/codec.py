@@ -0,0 +1,62 @@
+from json import dumps, loads
+from typing import Any, Protocol, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec(Protocol):
+    def loads(self, data: Union[str, bytes]) -> Any:
+        ...
+
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+
+class StdlibJSONCodec:
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return dumps(obj, separators=(",", ":")).encode()
+
+
+class OrjsonCodec:
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson must be installed to use OrjsonCodec.")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+
+class UjsonCodec:
+    def __init__(self) -> None:
+        if ujson is None:
+            raise RuntimeError("ujson must be installed to use UjsonCodec.")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return ujson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode()
+
+
+def default_codec() -> JSONCodec:
+    """Get the fastest JSON codec available, preferring orjson, then ujson."""
+
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return StdlibJSONCodec()
@@ -1,18 +1,40 @@
+from .chunking import MemberChunker
 from .client import GatewayClient
+from .cluster import Cluster, IPCGatewayRateLimiter
+from .dispatch import DispatchPipeline, OverflowPolicy, PipelineConfig, PipelineStats
 from .enums import EventDirection, GatewayCloseCodes, GatewayOps, ShardStatus
 from .errors import GatewayCriticalError, GatewayReconnect
+from .heartbeat import HeartbeatScheduler
+from .outbound import OutboundScheduler
+from .payload import LazyPayload
 from .ratelimiting import GatewayRateLimiter, LocalGatewayRateLimiter
+from .registry import CallbackRegistry
+from .session import FileSessionStore, SessionSnapshot, SessionStore
 from .shard import Shard
 
 __all__ = (
+    "CallbackRegistry",
+    "Cluster",
+    "DispatchPipeline",
     "EventDirection",
+    "FileSessionStore",
     "GatewayClient",
     "GatewayCloseCodes",
     "GatewayCriticalError",
     "GatewayOps",
     "GatewayRateLimiter",
     "GatewayReconnect",
+    "HeartbeatScheduler",
+    "IPCGatewayRateLimiter",
+    "LazyPayload",
     "LocalGatewayRateLimiter",
+    "MemberChunker",
+    "OutboundScheduler",
+    "OverflowPolicy",
+    "PipelineConfig",
+    "PipelineStats",
+    "SessionSnapshot",
+    "SessionStore",
     "Shard",
     "ShardStatus",
 )
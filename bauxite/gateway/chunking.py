@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from asyncio import Queue, TimeoutError, create_task, gather, wait_for
+from itertools import count
+from time import monotonic
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, Optional, Union
+
+from .enums import EventDirection, GatewayOps
+from .payload import Payload
+
+if TYPE_CHECKING:
+    from .shard import Shard
+
+# Discord accepts at most 100 user ids in one REQUEST_GUILD_MEMBERS.
+MAX_USER_IDS = 100
+
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+class _ChunkRequest:
+    __slots__ = ("nonce", "payload", "received", "totals", "deadline", "queue")
+
+    def __init__(
+        self, nonce: str, payload: dict, guild_ids: list[int], queue: Queue
+    ) -> None:
+        self.nonce = nonce
+        self.payload = {**payload, "nonce": nonce}
+        self.received: dict[int, set[int]] = {id: set() for id in guild_ids}
+        self.totals: dict[int, int] = {}
+        self.deadline: Optional[float] = None
+        self.queue = queue
+
+    @property
+    def complete(self) -> bool:
+        return all(
+            id in self.totals and len(indexes) >= self.totals[id]
+            for id, indexes in self.received.items()
+        )
+
+    def add(self, chunk: dict) -> None:
+        guild_id = int(chunk["guild_id"])
+
+        if guild_id in self.received:
+            self.received[guild_id].add(chunk["chunk_index"])
+            self.totals[guild_id] = chunk["chunk_count"]
+
+
+class MemberChunker:
+    """Requests guild members over the gateway and collects the
+    GUILD_MEMBERS_CHUNK dispatches sent in response, correlated by nonce.
+
+    Each request goes to the shard of its guilds and through that shard's
+    outbound scheduler, so it waits its turn within the send limit.
+    """
+
+    def __init__(self, shards: dict[int, Shard]) -> None:
+        self._shards = shards
+        self._requests: dict[str, _ChunkRequest] = {}
+        self._nonces = count()
+
+    async def handle(
+        self, shard: Shard, direction: EventDirection, data: Payload
+    ) -> None:
+        chunk = data["d"]
+
+        if request := self._requests.get(chunk.get("nonce")):
+            request.queue.put_nowait((request, chunk))
+
+    def _payloads(
+        self,
+        guild_ids: list[int],
+        query: str,
+        limit: int,
+        user_ids: Optional[list[int]],
+        presences: bool,
+        guilds_per_request: int,
+    ) -> Iterable[tuple[list[int], dict]]:
+        for i in range(0, len(guild_ids), guilds_per_request):
+            guilds = guild_ids[i : i + guilds_per_request]
+            base: dict[str, Any] = {
+                "guild_id": guilds[0] if len(guilds) == 1 else guilds,
+                "presences": presences,
+            }
+
+            if user_ids is None:
+                yield guilds, {**base, "query": query, "limit": limit}
+                continue
+
+            for j in range(0, len(user_ids), MAX_USER_IDS):
+                yield guilds, {**base, "user_ids": user_ids[j : j + MAX_USER_IDS]}
+
+    async def _send(
+        self, shard: Shard, requests: list[_ChunkRequest], timeout: float
+    ) -> None:
+        for request in requests:
+            try:
+                await wait_for(shard._ready.wait(), timeout)
+            except TimeoutError:
+                raise TimeoutError(
+                    "Timed out waiting for guild member chunks."
+                ) from None
+
+            await shard.send(
+                {"op": GatewayOps.REQUEST_GUILD_MEMBERS, "d": request.payload}
+            )
+
+            # Time the request from when it was written, and wake the
+            # consumer so that it starts doing so.
+            request.deadline = monotonic()
+            request.queue.put_nowait((request, None))
+
+    async def request(
+        self,
+        guild_ids: Union[int, Iterable[int]],
+        query: str = "",
+        limit: int = 0,
+        user_ids: Optional[list[int]] = None,
+        presences: bool = False,
+        timeout: float = 30,
+        guilds_per_request: int = 1,
+    ) -> AsyncIterator[dict]:
+        """Yield GUILD_MEMBERS_CHUNK payloads until every chunk for every
+        requested guild has arrived.
+
+        Raises TimeoutError if a sent request goes `timeout` seconds without
+        receiving a chunk, or its shard is not ready within `timeout` seconds.
+        """
+
+        if not self._shards:
+            raise ValueError("Members cannot be requested before shards exist.")
+
+        ids = [guild_ids] if isinstance(guild_ids, int) else list(guild_ids)
+        shard_count = next(iter(self._shards.values()))._count
+
+        by_shard: dict[int, list[int]] = {}
+
+        for id in ids:
+            shard_id = shard_for(id, shard_count)
+
+            if shard_id not in self._shards:
+                raise ValueError(f"Guild {id} is on shard {shard_id}, not run here.")
+
+            by_shard.setdefault(shard_id, []).append(id)
+
+        queue: Queue = Queue()
+        requests: list[_ChunkRequest] = []
+        senders = []
+
+        for shard_id, guilds in by_shard.items():
+            shard_requests = [
+                _ChunkRequest(f"bauxite:{next(self._nonces)}", payload, batch, queue)
+                for batch, payload in self._payloads(
+                    guilds, query, limit, user_ids, presences, guilds_per_request
+                )
+            ]
+
+            requests += shard_requests
+            senders.append(
+                self._send(self._shards[shard_id], shard_requests, timeout)
+            )
+
+        for request in requests:
+            self._requests[request.nonce] = request
+
+        async def send() -> None:
+            try:
+                await gather(*senders)
+            except Exception as e:
+                queue.put_nowait((None, e))
+
+        sender = create_task(send())
+        remaining = len(requests)
+
+        try:
+            while remaining:
+                deadlines = [
+                    request.deadline
+                    for request in requests
+                    if request.deadline is not None and request.nonce in self._requests
+                ]
+                wait = None
+
+                if deadlines:
+                    wait = max(0, min(deadlines) + timeout - monotonic())
+
+                try:
+                    # Items already queued must not be lost to an expired wait.
+                    if queue.empty():
+                        request, chunk = await wait_for(queue.get(), wait)
+                    else:
+                        request, chunk = queue.get_nowait()
+                except TimeoutError:
+                    raise TimeoutError(
+                        "Timed out waiting for guild member chunks."
+                    ) from None
+
+                if request is None:
+                    raise chunk
+
+                if chunk is None or request.nonce not in self._requests:
+                    continue
+
+                request.add(chunk)
+                request.deadline = monotonic()
+
+                if request.complete:
+                    del self._requests[request.nonce]
+                    remaining -= 1
+
+                yield chunk
+        finally:
+            sender.cancel()
+            await gather(sender, return_exceptions=True)
+
+            for request in requests:
+                self._requests.pop(request.nonce, None)
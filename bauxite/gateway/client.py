@@ -1,17 +1,24 @@
 from __future__ import annotations
 
-from asyncio import Task, create_task, sleep
-from typing import Awaitable, Callable, Optional, Type
+from asyncio import Lock, Task, TimeoutError, create_task, gather, sleep, wait_for
+from time import monotonic
+from typing import AsyncIterator, Iterable, Optional, Type, Union
 
+from bauxite.codec import JSONCodec
 from bauxite.http import HTTPClient, Route
+from bauxite.metrics import MetricsRegistry
 
-from .enums import EventDirection
+from .chunking import MemberChunker
+from .dispatch import DispatchPipeline, PipelineConfig, PipelineStats
+from .enums import EventDirection, GatewayOps
 from .errors import GatewayCriticalError
+from .heartbeat import HeartbeatScheduler
+from .payload import Payload
 from .ratelimiting import GatewayRateLimiter, LocalGatewayRateLimiter
+from .registry import CallbackRegistry, DispatchCallback
+from .session import SessionStore
 from .shard import Shard, ShardStatusHook
 
-DispatchCallback = Callable[[Shard, EventDirection, dict], Awaitable[None]]
-
 
 class GatewayClient:
     def __init__(
@@ -23,6 +30,20 @@ class GatewayClient:
         start_limiter: Optional[Type[GatewayRateLimiter]] = None,
         status_hooks: Optional[list[ShardStatusHook]] = None,
         callbacks: Optional[list[DispatchCallback]] = None,
+        compress: Optional[str] = None,
+        encoding: str = "json",
+        codec: Optional[JSONCodec] = None,
+        lazy_decode: bool = False,
+        allowed_events: Optional[set[str]] = None,
+        dropped_events: Optional[set[str]] = None,
+        pipeline: Optional[PipelineConfig] = None,
+        gateway: Optional[dict] = None,
+        centralized_heartbeats: bool = False,
+        session_store: Optional[SessionStore] = None,
+        snapshot_interval: float = 60,
+        identify_interval: float = 5,
+        ready_timeout: float = 30,
+        metrics: Optional[MetricsRegistry] = None,
     ) -> None:
         self._http = http
 
@@ -32,17 +53,54 @@ class GatewayClient:
         self._shard_ids = shard_ids
         self._shard_hooks = status_hooks or []
 
-        self._dispatch_callbacks = callbacks or []
+        self._registry = CallbackRegistry()
+
+        for callback in callbacks or []:
+            self._registry.add(callback)
+
+        self._compress = compress
+        self._encoding = encoding
+        self._codec = codec or http._codec
+
+        self._lazy_decode = lazy_decode
+        self._allowed_events = allowed_events
+        self._dropped_events = dropped_events
+
+        self._pipeline_config = pipeline
+        self._pipelines: dict[int, DispatchPipeline] = {}
+
+        self._heartbeats = HeartbeatScheduler() if centralized_heartbeats else None
 
         self._shards: dict[int, Shard] = {}
         self._tasks: dict[int, Task] = {}
 
-        self._gateway: Optional[dict] = None
+        self._chunker = MemberChunker(self._shards)
+        self._registry.add(
+            self._chunker.handle,
+            EventDirection.INBOUND,
+            GatewayOps.DISPATCH,
+            "GUILD_MEMBERS_CHUNK",
+        )
+
+        self._gateway: Optional[dict] = gateway
+
+        self._sessions = session_store
+        self._snapshot_interval = snapshot_interval
+        self._snapshotter: Optional[Task] = None
 
         self._limiter_class: Type[GatewayRateLimiter] = (
             start_limiter or LocalGatewayRateLimiter
         )
+        self._identify_interval = identify_interval
+        self._limiter: Optional[GatewayRateLimiter] = None
+        self._max_concurrency = 1
+        self._key_locks: dict[int, Lock] = {}
+        self._turns: set[Task] = set()
+        self._ready_timeout = ready_timeout
+        self._metrics = metrics
+
         self._panic: Optional[int] = None
+        self._closed = False
 
     def _panic_cb(self, code: int) -> None:
         self._panic = code
@@ -51,70 +109,235 @@ class GatewayClient:
         if self._shard_count and not self._shard_ids:
             self._shard_ids = list(range(self._shard_count))
 
-        self._gateway = gateway = await (
-            await self._http.request(Route("GET", "/gateway/bot"))
-        ).json()
+        if self._gateway is None:
+            self._gateway = await self._http.read_json(
+                await self._http.request(Route("GET", "/gateway/bot"))
+            )
+
+        gateway = self._gateway
 
         if self._shard_count:
             assert self._shard_ids
 
             for id in self._shard_ids:
-                self._shards[id] = Shard(
-                    id,
-                    self._shard_count,
-                    self._http._token,
-                    self._intents,
-                    self._panic_cb,
-                    self._dispatch,
-                    self._shard_hooks,
-                )
+                self._shards[id] = self._create_shard(id, self._shard_count)
         else:
             for id in range(gateway["shards"]):
-                self._shards[id] = Shard(
-                    id,
-                    gateway["shards"],
-                    self._http._token,
-                    self._intents,
-                    self._panic_cb,
-                    self._dispatch,
-                    self._shard_hooks,
-                )
+                self._shards[id] = self._create_shard(id, gateway["shards"])
+
+        if self._sessions:
+            await self._restore_sessions(self._sessions)
+
+            self._snapshotter = create_task(self._snapshot_loop())
 
         await self._start_shards()
 
+    def _create_shard(self, id: int, count: int) -> Shard:
+        callback = self._dispatch
+
+        if self._pipeline_config:
+            pipeline = DispatchPipeline(self._dispatch, self._pipeline_config)
+            self._pipelines[id] = pipeline
+            callback = pipeline.submit
+
+        return Shard(
+            id,
+            count,
+            self._http._token,
+            self._intents,
+            self._panic_cb,
+            callback,
+            self._shard_hooks,
+            compress=self._compress,
+            encoding=self._encoding,
+            codec=self._codec,
+            lazy_decode=self._lazy_decode,
+            allowed_events=self._allowed_events,
+            dropped_events=self._dropped_events,
+            heartbeat_scheduler=self._heartbeats,
+            metrics=self._metrics,
+            identify_hook=self._identify_turn,
+        )
+
+    async def _restore_sessions(self, store: SessionStore) -> None:
+        for shard in self._shards.values():
+            snapshot = await store.load(shard.id)
+
+            if snapshot and snapshot.shard_count == shard._count:
+                shard.restore(snapshot)
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await sleep(self._snapshot_interval)
+            await self.save_sessions()
+
+    async def save_sessions(self) -> None:
+        """Snapshot the session of every shard into the session store."""
+
+        if not self._sessions:
+            return
+
+        for shard in self._shards.values():
+            if snapshot := shard.snapshot():
+                await self._sessions.save(snapshot)
+            else:
+                await self._sessions.delete(shard.id)
+
     async def _start_shards(self) -> None:
         assert self._gateway, "Client gateway is not set while starting shards."
 
-        limiter = self._limiter_class(
-            self._gateway["session_start_limit"]["max_concurrency"], 5
-        )
+        max_concurrency = self._gateway["session_start_limit"]["max_concurrency"]
+
+        self._max_concurrency = max_concurrency
+        self._limiter = self._limiter_class(max_concurrency, self._identify_interval)
+
+        # Identifies are rate limited per `shard_id % max_concurrency` key, so
+        # each key starts its shards one at a time while keys run in parallel.
+        keys: dict[int, list[Shard]] = {}
 
         for shard in self._shards.values():
+            if shard._session:
+                # Resuming does not count against the identify budget.
+                self._tasks[shard.id] = create_task(self._run_shard(shard))
+            else:
+                keys.setdefault(shard.id % max_concurrency, []).append(shard)
+
+        await gather(*(self._start_key(shards) for shards in keys.values()))
+
+        while not self._closed:
+            if self._panic is not None:
+                raise GatewayCriticalError(self._panic)
+            await sleep(1)
+
+    async def _start_key(self, shards: list[Shard]) -> None:
+        for shard in shards:
             if self._panic is not None:
                 raise GatewayCriticalError(self._panic)
+            if self._closed:
+                return
 
-            await limiter.wait()
+            await self._identify_turn(shard)
 
+            shard._identify_granted = True
             self._tasks[shard.id] = create_task(self._run_shard(shard))
 
-        while True:
-            if self._panic is not None:
-                raise GatewayCriticalError(self._panic)
-            await sleep(1)
+    async def _identify_turn(self, shard: Shard) -> None:
+        """Wait until a shard may identify under its key's rate limit.
+
+        The key is held until the shard is ready, or `ready_timeout` passes,
+        and `identify_interval` has passed since the turn began. Shards that
+        fail to resume identify through here too.
+        """
+
+        assert self._limiter, "Client limiter is not set while identifying."
+
+        key = shard.id % self._max_concurrency
+        lock = self._key_locks.setdefault(key, Lock())
+        await lock.acquire()
+
+        try:
+            await self._limiter.wait(key)
+        except BaseException:
+            lock.release()
+            raise
+
+        turn = create_task(self._end_turn(shard, lock, monotonic()))
+        self._turns.add(turn)
+        turn.add_done_callback(self._turns.discard)
+
+    async def _end_turn(self, shard: Shard, lock: Lock, started: float) -> None:
+        try:
+            try:
+                await wait_for(shard._ready.wait(), self._ready_timeout)
+            except TimeoutError:
+                pass
+
+            await sleep(started + self._identify_interval - monotonic())
+        finally:
+            lock.release()
 
     async def _run_shard(self, shard: Shard) -> None:
         assert (
             self._gateway
         ), f"Client gateway is not set while running shard {shard.id}."
 
-        await shard.connect(self._http._session, self._gateway["url"])
+        await shard.connect(self._http._gateway_session, self._gateway["url"])
 
     async def _dispatch(
-        self, shard: Shard, direction: EventDirection, data: dict
+        self, shard: Shard, direction: EventDirection, data: Payload
     ) -> None:
-        for callback in self._dispatch_callbacks:
+        for callback in self._registry.get(direction, data["op"], data.get("t")):
             await callback(shard, direction, data)
 
+    async def close(self) -> None:
+        """Disconnect every shard, keeping their sessions resumable and saving
+        them to the session store if one is set."""
+
+        self._closed = True
+
+        if self._snapshotter:
+            self._snapshotter.cancel()
+
+        for task in self._tasks.values():
+            task.cancel()
+
+        for task in list(self._turns):
+            task.cancel()
+
+        for shard in self._shards.values():
+            await shard._close()
+
+        for pipeline in self._pipelines.values():
+            pipeline.close()
+
+        await self.save_sessions()
+
+    def add_listener(
+        self,
+        callback: DispatchCallback,
+        direction: Optional[EventDirection] = None,
+        op: Optional[int] = None,
+        event: Optional[str] = None,
+    ) -> None:
+        self._registry.add(callback, direction, op, event)
+
+    def remove_listener(
+        self,
+        callback: DispatchCallback,
+        direction: Optional[EventDirection] = None,
+        op: Optional[int] = None,
+        event: Optional[str] = None,
+    ) -> None:
+        self._registry.remove(callback, direction, op, event)
+
+    def request_members(
+        self,
+        guild_ids: Union[int, Iterable[int]],
+        query: str = "",
+        limit: int = 0,
+        user_ids: Optional[list[int]] = None,
+        presences: bool = False,
+        timeout: float = 30,
+        guilds_per_request: int = 1,
+    ) -> AsyncIterator[dict]:
+        """Request the members of guilds from their shards, iterating over the
+        GUILD_MEMBERS_CHUNK payloads until every chunk has arrived."""
+
+        return self._chunker.request(
+            guild_ids, query, limit, user_ids, presences, timeout, guilds_per_request
+        )
+
+    def pipeline_stats(self) -> dict[int, PipelineStats]:
+        return {id: pipeline.stats() for id, pipeline in self._pipelines.items()}
+
+    def startup_progress(self) -> tuple[int, int]:
+        ready = sum(shard.is_ready for shard in self._shards.values())
+
+        return ready, len(self._shards)
+
+    def latencies(self) -> dict[int, Optional[float]]:
+        return {id: shard.latency for id, shard in self._shards.items()}
+
     def get_shard(self, id: int) -> Shard:
         if id not in self._shards:
             raise ValueError(f"Shard of id {id} does not exist.")
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from asyncio import (
+    AbstractServer,
+    Lock,
+    StreamReader,
+    StreamWriter,
+    create_task,
+    open_unix_connection,
+    run,
+    sleep,
+    start_unix_server,
+)
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from os import getpid, path, unlink
+from tempfile import gettempdir
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Type
+
+from bauxite.http import HTTPClient, Route
+
+from .client import GatewayClient
+from .enums import ShardStatus
+from .errors import GatewayCriticalError
+from .ratelimiting import LocalGatewayRateLimiter
+from .registry import DispatchCallback
+
+if TYPE_CHECKING:
+    from .shard import Shard
+
+ClusterStatusHook = Callable[[int, int, ShardStatus], Awaitable[None]]
+
+
+class _WorkerLink:
+    """A worker process' connection to the cluster supervisor."""
+
+    def __init__(self, socket_path: str, worker_id: int) -> None:
+        self._path = socket_path
+        self._worker_id = worker_id
+
+        self._reader: Optional[StreamReader] = None
+        self._writer: Optional[StreamWriter] = None
+
+        self._lock = Lock()
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await open_unix_connection(self._path)
+        self._writer.write(f"W {self._worker_id}\n".encode())
+
+    async def identify(self, key: Optional[int] = None) -> None:
+        assert self._reader and self._writer, "Worker link is not connected."
+
+        async with self._lock:
+            self._writer.write(b"I\n" if key is None else f"I {key}\n".encode())
+            await self._writer.drain()
+
+            if not await self._reader.readline():
+                raise ConnectionError("Cluster supervisor closed the connection.")
+
+    async def report(self, shard: Shard, status: ShardStatus) -> None:
+        assert self._writer, "Worker link is not connected."
+
+        self._writer.write(f"S {shard.id} {status.name}\n".encode())
+
+    async def panic(self, code: int) -> None:
+        assert self._writer, "Worker link is not connected."
+
+        self._writer.write(f"P {code}\n".encode())
+        await self._writer.drain()
+
+
+class IPCGatewayRateLimiter:
+    """A GatewayRateLimiter that asks a cluster supervisor before each start,
+    so that workers never identify beyond the shared `max_concurrency`, nor
+    more than once per interval on any key."""
+
+    link: _WorkerLink
+
+    def __init__(self, rate: int, per: float) -> None:
+        self.per = per
+
+    @classmethod
+    def bind(cls, link: _WorkerLink) -> Type[IPCGatewayRateLimiter]:
+        return type(cls.__name__, (cls,), {"link": link})
+
+    async def wait(self, key: Optional[int] = None) -> None:
+        await self.link.identify(key)
+
+
+@dataclass
+class _WorkerConfig:
+    worker_id: int
+    socket_path: str
+    token: str
+    intents: int
+    shard_count: int
+    shard_ids: list[int]
+    gateway: dict
+    callbacks: list[DispatchCallback]
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+async def _worker(config: _WorkerConfig) -> None:
+    link = _WorkerLink(config.socket_path, config.worker_id)
+    await link.connect()
+
+    http = HTTPClient(config.token)
+    client = GatewayClient(
+        http,
+        config.intents,
+        shard_count=config.shard_count,
+        shard_ids=config.shard_ids,
+        start_limiter=IPCGatewayRateLimiter.bind(link),
+        status_hooks=[link.report],
+        callbacks=config.callbacks,
+        gateway=config.gateway,
+        **config.options,
+    )
+
+    try:
+        await client.spawn_shards()
+    except GatewayCriticalError as e:
+        await link.panic(e.code)
+        raise
+    finally:
+        await http.close()
+
+
+def _run_worker(config: _WorkerConfig) -> None:
+    run(_worker(config))
+
+
+class Cluster:
+    """Run shards across several worker processes.
+
+    The supervisor fetches `/gateway/bot` once, splits the shards between
+    `workers` processes which each run a `GatewayClient`, and hands out the
+    identify budget to them over a unix socket. Workers that exit are
+    restarted. Callbacks run inside the worker processes, so they must be
+    picklable (defined at module level).
+    """
+
+    def __init__(
+        self,
+        token: str,
+        intents: int,
+        workers: int,
+        shard_count: Optional[int] = None,
+        shard_ids: Optional[list[int]] = None,
+        callbacks: Optional[list[DispatchCallback]] = None,
+        status_hooks: Optional[list[ClusterStatusHook]] = None,
+        socket_path: Optional[str] = None,
+        client_options: Optional[dict[str, Any]] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("A cluster needs at least one worker.")
+
+        self._token = token
+        self._intents = intents
+        self._workers = workers
+
+        self._shard_count = shard_count
+        self._shard_ids = shard_ids
+        self._callbacks = callbacks or []
+        self._hooks = status_hooks or []
+        self._options = client_options or {}
+
+        self._path = socket_path or path.join(
+            gettempdir(), f"bauxite-cluster-{getpid()}.sock"
+        )
+
+        self._context = get_context("spawn")
+        self._configs: list[_WorkerConfig] = []
+        self._processes: list[BaseProcess] = []
+
+        self._server: Optional[AbstractServer] = None
+        self._limiter: Optional[LocalGatewayRateLimiter] = None
+        self._panic: Optional[int] = None
+
+    async def _handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        worker_id = -1
+
+        while line := await reader.readline():
+            command, *args = line.decode().split()
+
+            if command == "W":
+                worker_id = int(args[0])
+            elif command == "I":
+                assert self._limiter, "Cluster limiter is not set."
+
+                await self._limiter.wait(int(args[0]) if args else None)
+                writer.write(b"\n")
+            elif command == "S":
+                for hook in self._hooks:
+                    create_task(hook(worker_id, int(args[0]), ShardStatus[args[1]]))
+            elif command == "P":
+                self._panic = int(args[0])
+
+        writer.close()
+
+    def _spawn(self, config: _WorkerConfig) -> BaseProcess:
+        process = self._context.Process(  # type: ignore
+            target=_run_worker, args=(config,), daemon=True
+        )
+        process.start()
+
+        return process
+
+    async def start(self) -> None:
+        http = HTTPClient(self._token)
+
+        try:
+            gateway = await http.read_json(
+                await http.request(Route("GET", "/gateway/bot"))
+            )
+        finally:
+            await http.close()
+
+        shard_count = self._shard_count or gateway["shards"]
+        shard_ids = self._shard_ids or list(range(shard_count))
+
+        self._limiter = LocalGatewayRateLimiter(
+            gateway["session_start_limit"]["max_concurrency"],
+            self._options.get("identify_interval", 5),
+        )
+
+        if path.exists(self._path):
+            unlink(self._path)
+
+        self._server = await start_unix_server(self._handle, self._path)
+
+        for worker_id in range(min(self._workers, len(shard_ids))):
+            config = _WorkerConfig(
+                worker_id,
+                self._path,
+                self._token,
+                self._intents,
+                shard_count,
+                shard_ids[worker_id :: self._workers],
+                gateway,
+                self._callbacks,
+                self._options,
+            )
+
+            self._configs.append(config)
+            self._processes.append(self._spawn(config))
+
+        while True:
+            if self._panic is not None:
+                await self.close()
+                raise GatewayCriticalError(self._panic)
+
+            for i, process in enumerate(self._processes):
+                if not process.is_alive():
+                    self._processes[i] = self._spawn(self._configs[i])
+
+            await sleep(1)
+
+    async def close(self) -> None:
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+        if path.exists(self._path):
+            unlink(self._path)
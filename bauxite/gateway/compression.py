@@ -0,0 +1,33 @@
+from typing import Optional
+from zlib import decompressobj
+
+ZLIB_SUFFIX = b"\x00\x00\xff\xff"
+
+
+class ZlibStream:
+    """An incremental inflater for zlib-stream transport compression.
+
+    Discord compresses the whole connection as a single zlib stream, flushing
+    with Z_SYNC_FLUSH at the end of every payload. Frames are buffered until
+    the flush suffix is seen, at which point the full payload is inflated.
+    """
+
+    __slots__ = ("_inflator", "_buffer")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self._inflator = decompressobj()
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> Optional[bytes]:
+        self._buffer.extend(data)
+
+        if len(self._buffer) < 4 or self._buffer[-4:] != ZLIB_SUFFIX:
+            return
+
+        payload = self._inflator.decompress(self._buffer)
+        self._buffer.clear()
+
+        return payload
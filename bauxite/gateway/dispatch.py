@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from asyncio import Future, Task, create_task, get_running_loop
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum, auto
+from time import monotonic
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from .enums import EventDirection, GatewayOps
+from .payload import Payload
+
+if TYPE_CHECKING:
+    from .shard import Shard
+
+_Item = tuple[float, "Shard", EventDirection, Payload]
+
+
+class OverflowPolicy(Enum):
+    BLOCK = auto()
+    DROP_OLDEST = auto()
+    SPILL = auto()
+
+
+@dataclass
+class PipelineConfig:
+    """Configuration for a per-shard dispatch pipeline.
+
+    `max_size` bounds each queue. When a queue is full, `policy` decides
+    whether the queue grows past its bound up to `spill_limit` (`SPILL`), the
+    oldest queued event is discarded (`DROP_OLDEST`), or the shard's read
+    loop waits (`BLOCK`). A spilled queue at `spill_limit` discards its
+    oldest event, and protocol frames are never discarded.
+    `BLOCK` also stops heartbeat ACKs being read while it waits, which can
+    get a healthy connection closed as a zombie. With `ordered`, events for
+    the same guild are always handled by the same worker, in the order they
+    were received.
+    """
+
+    workers: int = 4
+    max_size: int = 1000
+    policy: OverflowPolicy = OverflowPolicy.SPILL
+    spill_limit: int = 10000
+    ordered: bool = False
+
+
+@dataclass
+class PipelineStats:
+    depth: int
+    processed: int
+    dropped: int
+    spilled: int
+    errors: int
+    lag: float
+    max_lag: float
+
+
+def _protocol(direction: EventDirection, data: Payload) -> bool:
+    return direction == EventDirection.OUTBOUND or data["op"] != GatewayOps.DISPATCH
+
+
+def _wake(waiters: deque[Future]) -> None:
+    while waiters:
+        waiter = waiters.popleft()
+
+        if not waiter.done():
+            waiter.set_result(None)
+            return
+
+
+class _Lane:
+    __slots__ = ("items", "max_size", "_getters", "_putters")
+
+    def __init__(self, max_size: int) -> None:
+        self.items: deque[_Item] = deque()
+        self.max_size = max_size
+
+        self._getters: deque[Future] = deque()
+        self._putters: deque[Future] = deque()
+
+    def full(self) -> bool:
+        return len(self.items) >= self.max_size
+
+    def push(self, item: _Item) -> None:
+        self.items.append(item)
+        _wake(self._getters)
+
+    def drop_oldest(self) -> bool:
+        for i, (_, _, direction, data) in enumerate(self.items):
+            if not _protocol(direction, data):
+                del self.items[i]
+                return True
+
+        return False
+
+    async def put(self, item: _Item) -> None:
+        while self.full():
+            waiter = get_running_loop().create_future()
+            self._putters.append(waiter)
+            await waiter
+
+        self.push(item)
+
+    async def get(self) -> _Item:
+        while not self.items:
+            waiter = get_running_loop().create_future()
+            self._getters.append(waiter)
+            await waiter
+
+        item = self.items.popleft()
+        _wake(self._putters)
+
+        return item
+
+
+class DispatchPipeline:
+    """A bounded queue between a shard's read loop and the dispatch callbacks.
+
+    Non-dispatch frames (HELLO, ACK, RECONNECT and outbound frames) are always
+    queued without waiting, so protocol handling never stalls behind user
+    callbacks.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Shard, EventDirection, Payload], Awaitable[None]],
+        config: PipelineConfig,
+    ) -> None:
+        if config.workers < 1:
+            raise ValueError("A dispatch pipeline needs at least one worker.")
+
+        self._callback = callback
+        self._config = config
+
+        lanes = config.workers if config.ordered else 1
+
+        self._lanes = [_Lane(config.max_size) for _ in range(lanes)]
+        self._workers: list[Task] = []
+
+        self._processed = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._errors = 0
+        self._lag = 0.0
+        self._max_lag = 0.0
+
+    def _lane(self, data: Payload) -> _Lane:
+        if len(self._lanes) == 1:
+            return self._lanes[0]
+
+        guild_id = None
+
+        if data["op"] == GatewayOps.DISPATCH and isinstance(d := data["d"], dict):
+            guild_id = d.get("guild_id")
+
+            if guild_id is None and (data["t"] or "").startswith("GUILD_"):
+                guild_id = d.get("id")
+
+        if guild_id is None:
+            return self._lanes[0]
+
+        return self._lanes[int(guild_id) % len(self._lanes)]
+
+    def _start(self) -> None:
+        for i in range(self._config.workers):
+            lane = self._lanes[i % len(self._lanes)]
+            self._workers.append(create_task(self._work(lane)))
+
+    async def _work(self, lane: _Lane) -> None:
+        loop = get_running_loop()
+
+        while True:
+            enqueued, shard, direction, data = await lane.get()
+
+            self._lag = lag = monotonic() - enqueued
+            if lag > self._max_lag:
+                self._max_lag = lag
+
+            try:
+                await self._callback(shard, direction, data)
+            except Exception as e:
+                self._errors += 1
+
+                loop.call_exception_handler(
+                    {
+                        "message": f"Dispatch callback failed on {shard!r}.",
+                        "exception": e,
+                    }
+                )
+
+            self._processed += 1
+
+    async def submit(
+        self, shard: Shard, direction: EventDirection, data: Payload
+    ) -> None:
+        if not self._workers:
+            self._start()
+
+        lane = self._lane(data)
+        item = (monotonic(), shard, direction, data)
+
+        if not lane.full():
+            lane.push(item)
+        elif _protocol(direction, data):
+            self._spilled += 1
+            lane.push(item)
+        elif self._config.policy == OverflowPolicy.BLOCK:
+            await lane.put(item)
+        elif (
+            self._config.policy == OverflowPolicy.SPILL
+            and len(lane.items) < self._config.spill_limit
+        ):
+            self._spilled += 1
+            lane.push(item)
+        else:
+            self._dropped += 1
+
+            # Protocol frames stay queued; with no dispatch left to discard
+            # the new event is dropped instead.
+            if lane.drop_oldest():
+                lane.push(item)
+
+    def stats(self) -> PipelineStats:
+        return PipelineStats(
+            depth=sum(len(lane.items) for lane in self._lanes),
+            processed=self._processed,
+            dropped=self._dropped,
+            spilled=self._spilled,
+            errors=self._errors,
+            lag=self._lag,
+            max_lag=self._max_lag,
+        )
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+        self._workers.clear()
@@ -5,6 +5,7 @@ class ShardStatus(Enum):
     CONNECTING = auto()
     CONNECTED = auto()
     RESUMING = auto()
+    READY = auto()
     ERRORED = auto()
 
 
@@ -0,0 +1,260 @@
+"""A pure-Python codec for the subset of Erlang's External Term Format that
+Discord sends and accepts on the gateway."""
+
+from struct import Struct
+from typing import Any, Callable
+
+VERSION = 131
+
+NEW_FLOAT_EXT = 70
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+_u16 = Struct(">H")
+_u32 = Struct(">I")
+_i32 = Struct(">i")
+_f64 = Struct(">d")
+
+_ATOMS = {"nil": None, "true": True, "false": False}
+
+
+class _Decoder:
+    __slots__ = ("data", "offset", "_handlers")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.offset = 0
+
+        self._handlers: dict[int, Callable[[], Any]] = {
+            MAP_EXT: self._map,
+            BINARY_EXT: self._binary,
+            SMALL_ATOM_UTF8_EXT: self._small_atom,
+            SMALL_ATOM_EXT: self._small_atom,
+            ATOM_UTF8_EXT: self._atom,
+            ATOM_EXT: self._atom,
+            SMALL_INTEGER_EXT: self._small_int,
+            INTEGER_EXT: self._int,
+            SMALL_BIG_EXT: self._small_big,
+            LARGE_BIG_EXT: self._large_big,
+            LIST_EXT: self._list,
+            NIL_EXT: self._nil,
+            STRING_EXT: self._string,
+            NEW_FLOAT_EXT: self._float,
+            SMALL_TUPLE_EXT: self._small_tuple,
+            LARGE_TUPLE_EXT: self._large_tuple,
+        }
+
+    def term(self) -> Any:
+        tag = self.data[self.offset]
+        self.offset += 1
+
+        try:
+            handler = self._handlers[tag]
+        except KeyError:
+            raise ValueError(f"Unsupported ETF term type {tag}.") from None
+
+        return handler()
+
+    def _u32(self) -> int:
+        value = _u32.unpack_from(self.data, self.offset)[0]
+        self.offset += 4
+        return value
+
+    def _bytes(self, size: int) -> bytes:
+        start = self.offset
+        self.offset += size
+        return self.data[start : self.offset]
+
+    def _map(self) -> dict:
+        arity = self._u32()
+        term = self.term
+
+        result = {}
+        for _ in range(arity):
+            key = term()
+            result[key] = term()
+
+        return result
+
+    def _binary(self) -> str:
+        return self._bytes(self._u32()).decode()
+
+    def _atom_value(self, size: int) -> Any:
+        name = self._bytes(size).decode()
+
+        if name in _ATOMS:
+            return _ATOMS[name]
+        return name
+
+    def _small_atom(self) -> Any:
+        size = self.data[self.offset]
+        self.offset += 1
+        return self._atom_value(size)
+
+    def _atom(self) -> Any:
+        size = _u16.unpack_from(self.data, self.offset)[0]
+        self.offset += 2
+        return self._atom_value(size)
+
+    def _small_int(self) -> int:
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def _int(self) -> int:
+        value = _i32.unpack_from(self.data, self.offset)[0]
+        self.offset += 4
+        return value
+
+    def _big(self, size: int) -> int:
+        sign = self.data[self.offset]
+        self.offset += 1
+
+        value = int.from_bytes(self._bytes(size), "little")
+        return -value if sign else value
+
+    def _small_big(self) -> int:
+        size = self.data[self.offset]
+        self.offset += 1
+        return self._big(size)
+
+    def _large_big(self) -> int:
+        return self._big(self._u32())
+
+    def _list(self) -> list:
+        length = self._u32()
+        term = self.term
+
+        result = [term() for _ in range(length)]
+
+        tail = term()
+        if tail != []:
+            raise ValueError("Improper ETF lists are not supported.")
+
+        return result
+
+    def _nil(self) -> list:
+        return []
+
+    def _string(self) -> list[int]:
+        size = _u16.unpack_from(self.data, self.offset)[0]
+        self.offset += 2
+        return list(self._bytes(size))
+
+    def _float(self) -> float:
+        value = _f64.unpack_from(self.data, self.offset)[0]
+        self.offset += 8
+        return value
+
+    def _small_tuple(self) -> list:
+        arity = self.data[self.offset]
+        self.offset += 1
+        return [self.term() for _ in range(arity)]
+
+    def _large_tuple(self) -> list:
+        return [self.term() for _ in range(self._u32())]
+
+
+def decode(data: bytes) -> Any:
+    """Decode an ETF payload into Python objects.
+
+    Binaries and atoms are decoded to `str`, the `nil`, `true` and `false`
+    atoms to their Python equivalents, and integers of any size (including
+    snowflakes) directly to `int`.
+    """
+
+    if not data or data[0] != VERSION:
+        raise ValueError("Payload is not a valid ETF term.")
+
+    decoder = _Decoder(data)
+    decoder.offset = 1
+
+    return decoder.term()
+
+
+def _encode_atom(buffer: bytearray, name: bytes) -> None:
+    buffer.append(SMALL_ATOM_UTF8_EXT)
+    buffer.append(len(name))
+    buffer += name
+
+
+def _encode_int(buffer: bytearray, value: int) -> None:
+    if 0 <= value < 256:
+        buffer.append(SMALL_INTEGER_EXT)
+        buffer.append(value)
+    elif -(1 << 31) <= value < (1 << 31):
+        buffer.append(INTEGER_EXT)
+        buffer += _i32.pack(value)
+    else:
+        magnitude = abs(value)
+        size = (magnitude.bit_length() + 7) // 8
+
+        if size < 256:
+            buffer.append(SMALL_BIG_EXT)
+            buffer.append(size)
+        else:
+            buffer.append(LARGE_BIG_EXT)
+            buffer += _u32.pack(size)
+
+        buffer.append(value < 0)
+        buffer += magnitude.to_bytes(size, "little")
+
+
+def _encode(buffer: bytearray, value: Any) -> None:
+    if value is None:
+        _encode_atom(buffer, b"nil")
+    elif value is True:
+        _encode_atom(buffer, b"true")
+    elif value is False:
+        _encode_atom(buffer, b"false")
+    elif isinstance(value, int):
+        _encode_int(buffer, int(value))
+    elif isinstance(value, float):
+        buffer.append(NEW_FLOAT_EXT)
+        buffer += _f64.pack(value)
+    elif isinstance(value, (str, bytes)):
+        raw = value.encode() if isinstance(value, str) else value
+
+        buffer.append(BINARY_EXT)
+        buffer += _u32.pack(len(raw))
+        buffer += raw
+    elif isinstance(value, dict):
+        buffer.append(MAP_EXT)
+        buffer += _u32.pack(len(value))
+
+        for key, item in value.items():
+            _encode(buffer, key)
+            _encode(buffer, item)
+    elif isinstance(value, (list, tuple)):
+        if value:
+            buffer.append(LIST_EXT)
+            buffer += _u32.pack(len(value))
+
+            for item in value:
+                _encode(buffer, item)
+
+        buffer.append(NIL_EXT)
+    else:
+        raise TypeError(f"Object of type {type(value).__name__} is not ETF encodable.")
+
+
+def encode(value: Any) -> bytes:
+    """Encode Python objects into an ETF payload."""
+
+    buffer = bytearray([VERSION])
+    _encode(buffer, value)
+
+    return bytes(buffer)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from asyncio import AbstractEventLoop, create_task, get_running_loop
+from heapq import heappop, heappush
+from itertools import count
+from random import random
+from typing import TYPE_CHECKING, Optional
+
+from bauxite.timer import TimerEntry, get_scheduler
+
+if TYPE_CHECKING:
+    from .shard import Shard
+
+
+class HeartbeatScheduler:
+    """Drives the heartbeats of many shards from a single timer.
+
+    Shards are kept in a heap ordered by when their next heartbeat is due.
+    When a heartbeat comes due and the previous one was never acknowledged,
+    the connection is considered a zombie and closed so the shard reconnects.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, int]] = []
+        self._shards: dict[int, tuple[Shard, float, int]] = {}
+        self._ids = count()
+
+        self._loop: Optional[AbstractEventLoop] = None
+        self._timer: Optional[TimerEntry] = None
+
+        self.zombies = 0
+
+    def __len__(self) -> int:
+        return len(self._shards)
+
+    def _arm(self) -> None:
+        if not self._heap:
+            return
+
+        when = self._heap[0][0]
+
+        if self._timer:
+            if self._timer.when <= when:
+                return
+            self._timer.cancel()
+
+        self._timer = get_scheduler().call_at(when, self._tick)
+
+    def _tick(self) -> None:
+        assert self._loop, "Heartbeat scheduler ticked before any shard was added."
+
+        self._timer = None
+        now = self._loop.time()
+
+        while self._heap and self._heap[0][0] <= now:
+            due, generation, shard_id = heappop(self._heap)
+
+            entry = self._shards.get(shard_id)
+            if not entry or entry[2] != generation:
+                continue
+
+            shard, interval, _ = entry
+
+            if shard._ack is False:
+                self.zombies += 1
+                del self._shards[shard_id]
+
+                create_task(shard._close())
+                continue
+
+            create_task(shard._heartbeat())
+            heappush(self._heap, (due + interval, generation, shard_id))
+
+        self._arm()
+
+    def add(self, shard: Shard, interval: float) -> None:
+        """Start heartbeating a shard every `interval` seconds, with the first
+        heartbeat jittered across the interval as Discord requires."""
+
+        self._loop = get_running_loop()
+
+        generation = next(self._ids)
+        self._shards[shard.id] = (shard, interval, generation)
+
+        heappush(
+            self._heap,
+            (self._loop.time() + interval * random(), generation, shard.id),
+        )
+        self._arm()
+
+    def remove(self, shard: Shard) -> None:
+        self._shards.pop(shard.id, None)
+
+    def latencies(self) -> dict[int, Optional[float]]:
+        return {id: shard.latency for id, (shard, _, _) in self._shards.items()}
@@ -0,0 +1,42 @@
+from bauxite.metrics import MetricsRegistry
+
+
+class ShardMetrics:
+    """The gateway instruments, shared by every shard using a registry."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.frames = registry.counter(
+            "bauxite_gateway_frames_total",
+            "Gateway frames sent and received.",
+            ("shard", "direction"),
+        )
+        self.bytes = registry.counter(
+            "bauxite_gateway_bytes_total",
+            "Gateway bytes sent and received, before decompression.",
+            ("shard", "direction"),
+        )
+        self.decode_time = registry.histogram(
+            "bauxite_gateway_decode_seconds",
+            "Time spent decompressing and decoding inbound frames.",
+            ("shard",),
+        )
+        self.dispatch_time = registry.histogram(
+            "bauxite_gateway_dispatch_seconds",
+            "Time spent handing inbound payloads to callbacks.",
+            ("shard",),
+        )
+        self.reconnects = registry.counter(
+            "bauxite_gateway_reconnects_total",
+            "Gateway connections made after the first.",
+            ("shard",),
+        )
+        self.resumes = registry.counter(
+            "bauxite_gateway_resumes_total",
+            "Sessions successfully resumed.",
+            ("shard",),
+        )
+        self.heartbeat_latency = registry.histogram(
+            "bauxite_gateway_heartbeat_latency_seconds",
+            "Time between a heartbeat and its acknowledgement.",
+            ("shard",),
+        )
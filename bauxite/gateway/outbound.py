@@ -0,0 +1,148 @@
+from asyncio import AbstractEventLoop, Future, Task, create_task, get_running_loop
+from collections import deque
+from time import monotonic
+from typing import Awaitable, Callable, Optional
+
+from bauxite.timer import get_scheduler
+
+from .enums import GatewayOps
+
+CRITICAL_OPS = {GatewayOps.HEARTBEAT, GatewayOps.IDENTIFY, GatewayOps.RESUME}
+
+
+class _Frame:
+    __slots__ = ("message", "waiters")
+
+    def __init__(self, message: dict, waiter: Future) -> None:
+        self.message = message
+        self.waiters = [waiter]
+
+
+def _wake(waiter: Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class OutboundScheduler:
+    """Orders a shard's outbound frames within the gateway send limit.
+
+    Protocol-critical frames (HEARTBEAT, IDENTIFY and RESUME) are sent first
+    and may use the whole budget of `rate` frames per `per` seconds, while
+    all other frames leave `reserved` of it free for them. A presence update
+    that has not been sent yet is replaced by a newer one.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[dict], Awaitable[None]],
+        rate: int = 120,
+        per: float = 60,
+        reserved: int = 5,
+    ) -> None:
+        if not 0 <= reserved < rate:
+            raise ValueError("Reserved frames must be fewer than the rate limit.")
+
+        self.rate = rate
+        self.per = per
+        self.reserved = reserved
+
+        self._write = write
+
+        self._critical: deque[_Frame] = deque()
+        self._normal: deque[_Frame] = deque()
+        self._presence: Optional[_Frame] = None
+
+        self._sent: deque[float] = deque()
+        self._drainer: Optional[Task] = None
+        self._wakeup: Optional[Future] = None
+
+    def __len__(self) -> int:
+        return len(self._critical) + len(self._normal)
+
+    def _next(self, now: float) -> Optional[_Frame]:
+        while self._sent and now - self._sent[0] >= self.per:
+            self._sent.popleft()
+
+        if self._critical and len(self._sent) < self.rate:
+            return self._critical.popleft()
+
+        if self._normal and len(self._sent) < self.rate - self.reserved:
+            frame = self._normal.popleft()
+
+            if frame is self._presence:
+                self._presence = None
+
+            return frame
+
+    async def _drain(self) -> None:
+        loop = get_running_loop()
+
+        try:
+            await self._run(loop)
+        finally:
+            self._drainer = None
+
+    async def _run(self, loop: AbstractEventLoop) -> None:
+        while self._critical or self._normal:
+            now = monotonic()
+
+            if not (frame := self._next(now)):
+                self._wakeup = waiter = loop.create_future()
+                timer = get_scheduler().call_later(
+                    self._sent[0] + self.per - now, _wake, waiter
+                )
+
+                await waiter
+                timer.cancel()
+                continue
+
+            self._sent.append(now)
+
+            try:
+                await self._write(frame.message)
+            except Exception as e:
+                for waiter in frame.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for waiter in frame.waiters:
+                    _wake(waiter)
+
+    async def send(self, message: dict) -> None:
+        """Queue a frame, returning once it has been written."""
+
+        waiter = get_running_loop().create_future()
+
+        if message["op"] in CRITICAL_OPS:
+            self._critical.append(_Frame(message, waiter))
+
+            if self._wakeup:
+                _wake(self._wakeup)
+        elif message["op"] == GatewayOps.PRESENCE_UPDATE and self._presence:
+            self._presence.message = message
+            self._presence.waiters.append(waiter)
+        else:
+            frame = _Frame(message, waiter)
+            self._normal.append(frame)
+
+            if message["op"] == GatewayOps.PRESENCE_UPDATE:
+                self._presence = frame
+
+        if not self._drainer:
+            self._drainer = create_task(self._drain())
+
+        await waiter
+
+    def fail(self, error: Exception) -> None:
+        """Fail every queued frame, such as when the connection closes."""
+
+        for lane in (self._critical, self._normal):
+            while lane:
+                for waiter in lane.popleft().waiters:
+                    if not waiter.done():
+                        waiter.set_exception(error)
+
+        self._presence = None
+
+        if self._wakeup:
+            _wake(self._wakeup)
@@ -0,0 +1,110 @@
+from re import compile
+from typing import Any, Callable, Iterator, Mapping, Optional, Union
+
+_VALUE = r'(null|-?\d+|"[A-Za-z0-9_]*")'
+_FIELD = r'"(t|s|op)"\s*:\s*' + _VALUE + r"\s*,\s*"
+_HEADER = r"\{\s*" + _FIELD * 3 + r'"d"\s*:'
+
+_HEADER_STR = compile(_HEADER)
+_HEADER_BYTES = compile(_HEADER.encode())
+
+Header = tuple[int, Optional[str], Optional[int], Union[str, bytes]]
+
+
+def _value(raw: Union[str, bytes]) -> Any:
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+
+    if raw == "null":
+        return None
+    if raw[0] == '"':
+        return raw[1:-1]
+    return int(raw)
+
+
+def peek_header(payload: Union[str, bytes]) -> Optional[Header]:
+    """Extract `op`, `t` and `s` from a raw JSON gateway payload without
+    decoding `d`.
+
+    This relies on Discord placing `d` after the other three keys. Payloads
+    of any other shape return `None` and should be decoded in full.
+    """
+
+    if isinstance(payload, bytes):
+        match = _HEADER_BYTES.match(payload)
+        end = payload.rfind(b"}")
+    else:
+        match = _HEADER_STR.match(payload)
+        end = payload.rfind("}")
+
+    if not match or end < match.end():
+        return
+
+    groups = match.groups()
+    fields = {
+        (key.decode() if isinstance(key, bytes) else key): _value(value)
+        for key, value in zip(groups[::2], groups[1::2])
+    }
+
+    if len(fields) != 3 or not isinstance(fields["op"], int):
+        return
+
+    return fields["op"], fields["t"], fields["s"], payload[match.end() : end]
+
+
+class LazyPayload(Mapping[str, Any]):
+    """A gateway payload whose `d` field is only decoded when accessed."""
+
+    __slots__ = ("op", "t", "s", "_raw", "_data", "_loads")
+
+    def __init__(
+        self,
+        op: int,
+        t: Optional[str],
+        s: Optional[int],
+        raw: Union[str, bytes],
+        loads: Callable[[Union[str, bytes]], Any],
+    ) -> None:
+        self.op = op
+        self.t = t
+        self.s = s
+
+        self._raw: Optional[Union[str, bytes]] = raw
+        self._data: Any = None
+        self._loads = loads
+
+    def __repr__(self) -> str:
+        state = "decoded" if self._raw is None else "pending"
+        return f"<LazyPayload op={self.op} t={self.t} s={self.s} d={state}>"
+
+    @property
+    def d(self) -> Any:
+        if self._raw is not None:
+            self._data = self._loads(self._raw)
+            self._raw = None
+
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "op":
+            return self.op
+        if key == "t":
+            return self.t
+        if key == "s":
+            return self.s
+        if key == "d":
+            return self.d
+
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("t", "s", "op", "d"))
+
+    def __len__(self) -> int:
+        return 4
+
+    def to_dict(self) -> dict:
+        return {"t": self.t, "s": self.s, "op": self.op, "d": self.d}
+
+
+Payload = Union[dict, LazyPayload]
@@ -1,29 +1,43 @@
-from asyncio import Semaphore, create_task, sleep
-from typing import Protocol
+from asyncio import Lock, Semaphore
+from typing import Optional, Protocol
+
+from bauxite.timer import get_scheduler
 
 
 class GatewayRateLimiter(Protocol):
-    per: int
+    per: float
 
-    def __init__(self, rate: int, per: int) -> None:
+    def __init__(self, rate: int, per: float) -> None:
         ...
 
-    async def wait(self) -> None:
+    async def wait(self, key: Optional[int] = None) -> None:
         ...
 
 
 class LocalGatewayRateLimiter:
-    def __init__(self, rate: int, per: int) -> None:
+    """Allows `rate` identifies every `per` seconds, and at most one every
+    `per` seconds for each `shard_id % max_concurrency` key given."""
+
+    def __init__(self, rate: int, per: float) -> None:
         self.per = per
 
         self._lock = Semaphore(rate)
+        self._keys: dict[int, Lock] = {}
 
-    async def _release(self, after: float) -> None:
-        await sleep(after)
+    async def wait(self, key: Optional[int] = None) -> None:
+        if key is None:
+            await self._lock.acquire()
+            get_scheduler().call_later(self.per, self._lock.release)
+            return
 
-        self._lock.release()
+        lock = self._keys.setdefault(key, Lock())
+        await lock.acquire()
 
-    async def wait(self) -> None:
-        await self._lock.acquire()
+        try:
+            await self._lock.acquire()
+        except BaseException:
+            lock.release()
+            raise
 
-        create_task(self._release(self.per))
+        get_scheduler().call_later(self.per, self._lock.release)
+        get_scheduler().call_later(self.per, lock.release)
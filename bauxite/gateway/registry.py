@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from .enums import EventDirection
+from .payload import Payload
+
+if TYPE_CHECKING:
+    from .shard import Shard
+
+DispatchCallback = Callable[["Shard", EventDirection, Payload], Awaitable[None]]
+
+_Key = tuple[Optional[EventDirection], Optional[int], Optional[str]]
+
+
+class CallbackRegistry:
+    """Dispatch callbacks indexed by direction, opcode and event name.
+
+    A `None` in any part of a registration is a wildcard. Lookups resolve the
+    matching callbacks once per distinct key and cache the result, so the
+    dispatch path only does a single dict lookup. Registrations are stored as
+    tuples and replaced on change rather than mutated, so callbacks can be
+    added or removed while a dispatch is iterating.
+    """
+
+    def __init__(self) -> None:
+        self._entries: tuple[tuple[_Key, DispatchCallback], ...] = ()
+        self._cache: dict[_Key, tuple[DispatchCallback, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(
+        self,
+        callback: DispatchCallback,
+        direction: Optional[EventDirection] = None,
+        op: Optional[int] = None,
+        event: Optional[str] = None,
+    ) -> None:
+        self._entries += (((direction, op, event), callback),)
+        self._cache = {}
+
+    def remove(
+        self,
+        callback: DispatchCallback,
+        direction: Optional[EventDirection] = None,
+        op: Optional[int] = None,
+        event: Optional[str] = None,
+    ) -> None:
+        entry = ((direction, op, event), callback)
+
+        if entry not in self._entries:
+            raise ValueError(
+                f"Callback {callback!r} is not registered for {entry[0]}."
+            )
+
+        entries = list(self._entries)
+        entries.remove(entry)
+
+        self._entries = tuple(entries)
+        self._cache = {}
+
+    def _resolve(self, key: _Key) -> tuple[DispatchCallback, ...]:
+        direction, op, event = key
+
+        callbacks = tuple(
+            callback
+            for (d, o, e), callback in self._entries
+            if (d is None or d == direction)
+            and (o is None or o == op)
+            and (e is None or e == event)
+        )
+        self._cache[key] = callbacks
+
+        return callbacks
+
+    def get(
+        self, direction: EventDirection, op: int, event: Optional[str]
+    ) -> tuple[DispatchCallback, ...]:
+        key = (direction, op, event)
+
+        if (callbacks := self._cache.get(key)) is not None:
+            return callbacks
+
+        return self._resolve(key)
@@ -0,0 +1,81 @@
+from asyncio import get_running_loop
+from dataclasses import asdict, dataclass
+from json import dumps, loads
+from os import makedirs, path, remove, replace
+from time import time
+from typing import Optional, Protocol
+
+
+@dataclass
+class SessionSnapshot:
+    shard_id: int
+    shard_count: int
+    session_id: str
+    seq: Optional[int]
+    resume_url: Optional[str]
+    saved_at: float
+
+
+class SessionStore(Protocol):
+    async def load(self, shard_id: int) -> Optional[SessionSnapshot]:
+        ...
+
+    async def save(self, snapshot: SessionSnapshot) -> None:
+        ...
+
+    async def delete(self, shard_id: int) -> None:
+        ...
+
+
+class FileSessionStore:
+    """Stores one JSON snapshot per shard in a directory.
+
+    Snapshots are written to a temporary file and moved into place, so a
+    crash mid-write never leaves a corrupt snapshot behind. Snapshots older
+    than `max_age` seconds are ignored, since Discord will not resume them.
+    File IO runs in the default executor, off the event loop.
+    """
+
+    def __init__(self, directory: str, max_age: float = 300) -> None:
+        self.directory = directory
+        self.max_age = max_age
+
+        makedirs(directory, exist_ok=True)
+
+    def _path(self, shard_id: int) -> str:
+        return path.join(self.directory, f"shard-{shard_id}.json")
+
+    def _load(self, shard_id: int) -> Optional[SessionSnapshot]:
+        try:
+            with open(self._path(shard_id)) as f:
+                snapshot = SessionSnapshot(**loads(f.read()))
+        except (OSError, ValueError, TypeError):
+            return
+
+        if time() - snapshot.saved_at > self.max_age:
+            return
+
+        return snapshot
+
+    def _save(self, snapshot: SessionSnapshot) -> None:
+        target = self._path(snapshot.shard_id)
+
+        with open(f"{target}.tmp", "w") as f:
+            f.write(dumps(asdict(snapshot)))
+
+        replace(f"{target}.tmp", target)
+
+    def _delete(self, shard_id: int) -> None:
+        try:
+            remove(self._path(shard_id))
+        except FileNotFoundError:
+            pass
+
+    async def load(self, shard_id: int) -> Optional[SessionSnapshot]:
+        return await get_running_loop().run_in_executor(None, self._load, shard_id)
+
+    async def save(self, snapshot: SessionSnapshot) -> None:
+        await get_running_loop().run_in_executor(None, self._save, snapshot)
+
+    async def delete(self, shard_id: int) -> None:
+        await get_running_loop().run_in_executor(None, self._delete, shard_id)
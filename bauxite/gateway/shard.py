@@ -1,21 +1,24 @@
-from asyncio import Task, create_task, sleep
-from random import randrange
+from asyncio import Event, Task, create_task, sleep
+from random import randrange, uniform
 from sys import platform
-from time import time
-from typing import Awaitable, Callable, Optional
-
-from aiohttp import (
-    ClientSession,
-    ClientWebSocketResponse,
-    WebSocketError,
-    WSMessage,
-    WSMsgType,
-    WSServerHandshakeError,
-)
+from time import perf_counter, time
+from typing import Any, Awaitable, Callable, Optional, Union
 
+from aiohttp import ClientSession, ClientWebSocketResponse, WSMessage, WSMsgType
+
+from bauxite.codec import JSONCodec, default_codec
+from bauxite.metrics import MetricsRegistry
+
+from . import etf
+from .compression import ZlibStream
 from .enums import EventDirection, GatewayCloseCodes, GatewayOps, ShardStatus
 from .errors import GatewayCriticalError, GatewayReconnect
-from .ratelimiting import GatewayRateLimiter, LocalGatewayRateLimiter
+from .heartbeat import HeartbeatScheduler
+from .metrics import ShardMetrics
+from .outbound import CRITICAL_OPS, OutboundScheduler
+from .payload import LazyPayload, Payload, peek_header
+from .ratelimiting import GatewayRateLimiter
+from .session import SessionSnapshot
 
 CRITICAL = [
     GatewayCloseCodes.NOT_AUTHENTICATED,
@@ -31,7 +34,19 @@ NONCRITICAL = [
     GatewayCloseCodes.SESSION_TIMEOUT,
 ]
 
+# Events the library itself needs to see, regardless of event filters. Member
+# chunks are only ever sent in response to a request for them.
+SESSION_EVENTS = {"READY", "RESUMED", "GUILD_MEMBERS_CHUNK"}
+
+# Closing with 1000 or 1001 invalidates the session, so any other code is used
+# when the shard means to resume.
+RESUMABLE_CLOSE = 4000
+
+COMPRESSION_MODES = [None, "zlib-stream"]
+ENCODINGS = ["json", "etf"]
+
 ShardStatusHook = Callable[["Shard", ShardStatus], Awaitable[None]]
+IdentifyHook = Callable[["Shard"], Awaitable[None]]
 
 
 class Shard:
@@ -42,10 +57,24 @@ class Shard:
         token: str,
         intents: int,
         panic_callback: Callable[[int], None],
-        callback: Callable[["Shard", EventDirection, dict], Awaitable[None]],
+        callback: Callable[["Shard", EventDirection, Payload], Awaitable[None]],
         status_hooks: list[ShardStatusHook],
         ratelimiter: Optional[GatewayRateLimiter] = None,
+        compress: Optional[str] = None,
+        encoding: str = "json",
+        codec: Optional[JSONCodec] = None,
+        lazy_decode: bool = False,
+        allowed_events: Optional[set[str]] = None,
+        dropped_events: Optional[set[str]] = None,
+        heartbeat_scheduler: Optional[HeartbeatScheduler] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        identify_hook: Optional[IdentifyHook] = None,
     ) -> None:
+        if compress not in COMPRESSION_MODES:
+            raise ValueError(f"Unsupported gateway compression mode {compress!r}.")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported gateway encoding {encoding!r}.")
+
         self.id = shard_id
 
         self._count = shard_count
@@ -54,7 +83,17 @@ class Shard:
         self._panic = panic_callback
         self._callback = callback
         self._hooks = status_hooks
-        self._send_limiter = ratelimiter or LocalGatewayRateLimiter(120, 60)
+        self._send_limiter = ratelimiter
+        self._outbound = OutboundScheduler(self._write)
+
+        self._compress = compress
+        self._encoding = encoding
+        self._codec = codec or default_codec()
+        self._inflator: Optional[ZlibStream] = ZlibStream() if compress else None
+
+        self._lazy = lazy_decode and encoding == "json"
+        self._allowed_events = allowed_events
+        self._dropped_events = dropped_events or set()
 
         self._ws: Optional[ClientWebSocketResponse] = None
         self._hb: Optional[float] = None
@@ -65,9 +104,22 @@ class Shard:
         self._last_ack: Optional[float] = None
 
         self._pacemaker: Optional[Task] = None
+        self._heartbeats = heartbeat_scheduler
 
         self._session: Optional[str] = None
         self._seq: Optional[int] = None
+        self._resume_url: Optional[str] = None
+
+        self._ready = Event()
+
+        # Identifies wait on the hook for their turn unless one was granted
+        # before the shard connected.
+        self._identify_hook = identify_hook
+        self._identify_granted = False
+        self._identifier: Optional[Task] = None
+
+        self._metrics = ShardMetrics(metrics) if metrics else None
+        self._label = str(shard_id)
 
     def __repr__(self) -> str:
         return f"<Shard id={self.id}>"
@@ -78,6 +130,32 @@ class Shard:
             return self._last_ack - self._last_hb
         return
 
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def snapshot(self) -> Optional[SessionSnapshot]:
+        """Capture the shard's session so it can be resumed later."""
+
+        if not self._session:
+            return
+
+        return SessionSnapshot(
+            self.id, self._count, self._session, self._seq, self._resume_url, time()
+        )
+
+    def restore(self, snapshot: SessionSnapshot) -> None:
+        """Resume a previously captured session on the next connection."""
+
+        self._session = snapshot.session_id
+        self._seq = snapshot.seq
+        self._resume_url = snapshot.resume_url
+
+    def _reset_session(self) -> None:
+        self._session = None
+        self._seq = None
+        self._resume_url = None
+
     def _status_hook(self, status: ShardStatus):
         for hook in self._hooks:
             create_task(hook(self, status))
@@ -90,29 +168,52 @@ class Shard:
             "headers": {"User-Agent": "Bauxite"},
         }
 
+        args["params"] = {"encoding": self._encoding}
+
+        if self._compress:
+            args["params"]["compress"] = self._compress
+
+        if self._inflator:
+            self._inflator.reset()
+
         self._ws = await session.ws_connect(url, **args)
 
     async def _connect(self, session: ClientSession, url: str) -> None:
         self._status_hook(ShardStatus.CONNECTING)
+        self._ready.clear()
+
+        resuming = bool(self._session and self._resume_url)
+
+        if resuming:
+            url = self._resume_url
 
         try:
             await self._spawn_ws(session, url)
-        except (WebSocketError, WSServerHandshakeError) as e:
-            return
-
-        if self._session:
-            await self._resume()
+        except Exception:
+            # A stale or unreachable resume URL falls back to the gateway URL.
+            if resuming:
+                self._resume_url = None
+            raise
 
         try:
             await self._read()
         except GatewayReconnect:
             pass
+        finally:
+            if resuming and not self._ready.is_set():
+                self._resume_url = None
 
     async def connect(self, session: ClientSession, url: str) -> None:
         backoff = 0.01
+        connected = False
 
         while True:
             await sleep(backoff)
+
+            if self._metrics and connected:
+                self._metrics.reconnects.inc(self._label)
+            connected = True
+
             try:
                 await self._connect(session, url)
                 backoff = 0.01
@@ -120,27 +221,99 @@ class Shard:
                 if backoff < 5:
                     backoff *= 2
 
-    async def _close(self) -> None:
+    async def _close(self, code: int = RESUMABLE_CLOSE) -> None:
         self._hb = None
 
         if self._ws and not self._ws.closed:
-            await self._ws.close()
+            await self._ws.close(code=code)
 
         if self._pacemaker and not self._pacemaker.cancelled():
             self._pacemaker.cancel()
 
-    async def _send(self, message: dict) -> None:
-        await self._send_limiter.wait()
+        if self._heartbeats:
+            self._heartbeats.remove(self)
+
+        if self._identifier and not self._identifier.done():
+            self._identifier.cancel()
+
+        self._outbound.fail(ConnectionResetError("Shard connection was closed."))
+
+    def _decode(self, data: Union[str, bytes]) -> Any:
+        if self._encoding == "etf":
+            return etf.decode(data)  # type: ignore
+        return self._codec.loads(data)
+
+    def _drops(self, event: Optional[str]) -> bool:
+        if event is None or event in SESSION_EVENTS:
+            return False
+        if self._allowed_events is not None and event not in self._allowed_events:
+            return True
+        return event in self._dropped_events
+
+    def _load(self, payload: Union[str, bytes]) -> Optional[Payload]:
+        """Decode a payload, tracking its sequence and applying event filters.
+
+        In lazy mode the header is read first, so dropped events never have
+        their `d` field decoded at all.
+        """
+
+        if self._lazy and (header := peek_header(payload)):
+            op, event, seq, data = header
+
+            if seq:
+                self._seq = seq
+            if self._drops(event):
+                return
+
+            return LazyPayload(op, event, seq, data, self._codec.loads)
+
+        message_data = self._decode(payload)
+
+        if s := message_data.get("s"):
+            self._seq = s
+        if self._drops(message_data.get("t")):
+            return
+
+        return message_data
+
+    async def _write(self, message: dict) -> None:
+        if self._send_limiter and message["op"] not in CRITICAL_OPS:
+            await self._send_limiter.wait()
+
+        if not self._ws or self._ws.closed:
+            raise ConnectionResetError("Shard is not connected.")
+
         await self._callback(self, EventDirection.OUTBOUND, message)
 
         try:
-            await self._ws.send_json(message)  # type: ignore
-        except OSError:
-            await self._close()
+            if self._encoding == "etf":
+                frame = etf.encode(message)
+                await self._ws.send_bytes(frame)
+            else:
+                frame = self._codec.dumps(message)
+                await self._ws.send_str(frame.decode())
         except Exception:
             await self._close()
             raise
 
+        if self._metrics:
+            self._metrics.frames.inc(self._label, "out")
+            self._metrics.bytes.inc(self._label, "out", amount=len(frame))
+
+    async def send(self, message: dict) -> None:
+        """Send a payload to the gateway, returning once it has been written.
+
+        Raises ConnectionResetError if the shard disconnects before then.
+        """
+
+        await self._outbound.send(message)
+
+    async def _send(self, message: dict) -> None:
+        try:
+            await self.send(message)
+        except OSError:
+            pass
+
     async def _identify(self) -> None:
         await self._send(
             {
@@ -158,6 +331,17 @@ class Shard:
             }
         )
 
+    async def _identify_in_turn(self) -> None:
+        if self._identify_hook and not self._identify_granted:
+            await self._identify_hook(self)
+
+        self._identify_granted = False
+        await self._identify()
+
+    def _start_identify(self) -> None:
+        # Waiting for a turn must not hold up the read loop.
+        self._identifier = create_task(self._identify_in_turn())
+
     async def _resume(self) -> None:
         self._status_hook(ShardStatus.RESUMING)
 
@@ -172,19 +356,53 @@ class Shard:
             }
         )
 
-    async def _dispatch(self, data: dict) -> None:
+    async def _dispatch(self, data: Payload) -> None:
         await self._callback(self, EventDirection.INBOUND, data)
 
         op = data["op"]
 
         if op == GatewayOps.HELLO:
-            self._pacemaker = create_task(
-                self._start_pacemaker(data["d"]["heartbeat_interval"])
-            )
-            await self._identify()
+            interval = data["d"]["heartbeat_interval"]
+
+            if self._heartbeats:
+                self._ack = None
+                self._heartbeats.add(self, interval / 1000)
+            else:
+                self._pacemaker = create_task(self._start_pacemaker(interval))
+
+            if self._session:
+                await self._resume()
+            else:
+                self._start_identify()
+        elif op == GatewayOps.DISPATCH and data["t"] == "READY":
+            self._session = data["d"]["session_id"]
+            self._resume_url = data["d"].get("resume_gateway_url")
+
+            self._ready.set()
+            self._status_hook(ShardStatus.READY)
+        elif op == GatewayOps.DISPATCH and data["t"] == "RESUMED":
+            if self._metrics:
+                self._metrics.resumes.inc(self._label)
+
+            self._ready.set()
+            self._status_hook(ShardStatus.READY)
+        elif op == GatewayOps.INVALID_SESSION:
+            if not data["d"]:
+                self._reset_session()
+
+            # Discord asks for a random 1-5 second wait before trying again.
+            await sleep(uniform(1, 5))
+
+            if self._session:
+                await self._resume()
+            else:
+                self._start_identify()
         elif op == GatewayOps.ACK:
             self._last_ack = time()
             self._ack = True
+
+            if self._metrics and self.latency is not None:
+                self._metrics.heartbeat_latency.observe(self.latency, self._label)
         elif op == GatewayOps.RECONNECT:
             await self._close()
             raise GatewayReconnect()
@@ -199,8 +417,7 @@ class Shard:
             raise GatewayCriticalError(code)
 
         if code in NONCRITICAL:
-            self._session = None
-            self._seq = None
+            self._reset_session()
 
         await self._close()
 
@@ -211,15 +428,43 @@ class Shard:
 
         assert self._ws, "WebSocket is not spawned while _read() is called."
 
+        metrics = self._metrics
+
         async for message in self._ws:
             message: WSMessage
 
-            if message.type == WSMsgType.TEXT:
-                message_data = message.json()
+            if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                continue
+
+            payload = message.data
+
+            if metrics:
+                # Text frames arrive decoded, so count their UTF-8 size.
+                size = len(payload.encode() if isinstance(payload, str) else payload)
+
+                metrics.frames.inc(self._label, "in")
+                metrics.bytes.inc(self._label, "in", amount=size)
+                started = perf_counter()
+
+            if message.type == WSMsgType.BINARY and self._inflator:
+                payload = self._inflator.feed(payload)
 
-                if s := message_data.get("s"):
-                    self._seq = s
+                if payload is None:
+                    continue
 
+            message_data = self._load(payload)
+
+            if metrics:
+                metrics.decode_time.observe(perf_counter() - started, self._label)
+
+            if message_data is None:
+                continue
+
+            if metrics:
+                started = perf_counter()
+                await self._dispatch(message_data)
+                metrics.dispatch_time.observe(perf_counter() - started, self._label)
+            else:
                 await self._dispatch(message_data)
 
         assert self._ws and self._ws.close_code
@@ -241,5 +486,6 @@ class Shard:
 
     async def _heartbeat(self) -> None:
         self._last_hb = time()
+        self._ack = False
 
         await self._send({"op": GatewayOps.HEARTBEAT, "d": self._seq})
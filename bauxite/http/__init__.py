@@ -1,4 +1,5 @@
-from .client import HTTPClient
+from .cache import CacheConfig, CacheStats, ResponseCache
+from .client import BulkResult, HTTPClient, RequestSpec
 from .errors import (
     BadGateway,
     BadRequest,
@@ -14,26 +15,75 @@ from .errors import (
     UnprocessableEntity,
 )
 from .file import File
-from .ratelimiting import BucketLock, LocalBucketLock, LocalRateLimiter, RateLimiter
+from .ipc import IPCBucketLock, IPCRateLimiter, RateLimitServer
+from .paginate import (
+    AUDIT_LOG_BEFORE,
+    BANS_AFTER,
+    BANS_BEFORE,
+    MEMBERS_AFTER,
+    MESSAGES_AFTER,
+    MESSAGES_BEFORE,
+    Cursor,
+)
+from .pool import PoolConfig, PoolStats
+from .ratelimiting import (
+    BucketLock,
+    BucketTableStats,
+    GlobalLimiterStats,
+    GlobalRateLimiter,
+    LocalBucketLock,
+    LocalGlobalRateLimiter,
+    LocalRateLimiter,
+    RateLimiter,
+    TokenBucketLock,
+    TokenBucketRateLimiter,
+)
 from .route import Route
+from .tracing import JSONLinesSink, RequestSpan, RequestTracer
 
 __all__ = (
+    "AUDIT_LOG_BEFORE",
+    "BANS_AFTER",
+    "BANS_BEFORE",
+    "MEMBERS_AFTER",
+    "MESSAGES_AFTER",
+    "MESSAGES_BEFORE",
     "BadGateway",
     "BadRequest",
     "BucketLock",
+    "BucketTableStats",
+    "BulkResult",
+    "CacheConfig",
+    "CacheStats",
+    "Cursor",
     "File",
     "Forbidden",
     "GatewayTimeout",
+    "GlobalLimiterStats",
+    "GlobalRateLimiter",
     "HTTPClient",
     "HTTPError",
+    "IPCBucketLock",
+    "IPCRateLimiter",
+    "JSONLinesSink",
     "LocalBucketLock",
+    "LocalGlobalRateLimiter",
     "LocalRateLimiter",
     "MethodNotAllowed",
     "NotFound",
+    "PoolConfig",
+    "PoolStats",
     "RateLimiter",
+    "RateLimitServer",
+    "RequestSpan",
+    "RequestSpec",
+    "RequestTracer",
+    "ResponseCache",
     "Route",
     "ServerError",
     "ServiceUnavailable",
+    "TokenBucketLock",
+    "TokenBucketRateLimiter",
     "TooManyRequests",
     "Unauthorized",
     "UnprocessableEntity",
@@ -0,0 +1,120 @@
+from asyncio import FIRST_COMPLETED, Task, create_task, gather, wait
+from collections import deque
+from typing import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+async def _iterate(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def schedule_by_bucket(
+    items: Union[Iterable[T], AsyncIterable[T]],
+    bucket: Callable[[T], str],
+    run: Callable[[T], Awaitable[R]],
+    concurrency: int,
+    per_bucket: int,
+    progress: Optional[ProgressCallback] = None,
+) -> AsyncGenerator[tuple[int, T, Optional[R], Optional[Exception]], None]:
+    """Run items with at most `concurrency` in flight overall and `per_bucket`
+    in flight per bucket, yielding `(index, item, result, error)` as each
+    completes.
+
+    Buckets take turns, so one busy bucket cannot starve the others, and
+    items are read from `items` only a bounded distance ahead of the ones
+    running. Closing the iterator cancels everything still running.
+    """
+
+    source = _iterate(items)
+    read_ahead = concurrency * 4
+    exhausted = False
+
+    queues: dict[str, deque[tuple[int, T]]] = {}
+    active: dict[str, int] = {}
+    ready: deque[str] = deque()
+    running: dict[Task, tuple[int, T, str]] = {}
+
+    submitted = queued = completed = 0
+
+    def mark_ready(key: str) -> None:
+        if key in queues and key not in ready and active.get(key, 0) < per_bucket:
+            ready.append(key)
+
+    try:
+        while True:
+            while not exhausted and queued < read_ahead:
+                try:
+                    item = await source.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+
+                key = bucket(item)
+                queues.setdefault(key, deque()).append((submitted, item))
+
+                submitted += 1
+                queued += 1
+                mark_ready(key)
+
+            while ready and len(running) < concurrency:
+                key = ready.popleft()
+                index, item = queues[key].popleft()
+                queued -= 1
+
+                if not queues[key]:
+                    del queues[key]
+
+                active[key] = active.get(key, 0) + 1
+                running[create_task(run(item))] = (index, item, key)
+
+                mark_ready(key)
+
+            if not running:
+                return
+
+            done, _ = await wait(running, return_when=FIRST_COMPLETED)
+
+            for task in done:
+                index, item, key = running.pop(task)
+
+                active[key] -= 1
+                if not active[key]:
+                    del active[key]
+
+                mark_ready(key)
+                completed += 1
+
+                if progress:
+                    progress(completed, submitted)
+
+                if error := task.exception():
+                    if not isinstance(error, Exception):
+                        raise error
+
+                    yield index, item, None, error
+                else:
+                    yield index, item, task.result(), None
+    finally:
+        for task in running:
+            task.cancel()
+
+        await gather(*running, return_exceptions=True)
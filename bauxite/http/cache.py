@@ -0,0 +1,196 @@
+from asyncio import Task, create_task, shield
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Awaitable, Callable, Optional, Union
+
+from aiohttp import ClientResponse
+
+from .route import Route
+
+CacheKey = tuple[str, str, tuple]
+
+
+@dataclass
+class CacheConfig:
+    """Settings for the opt-in GET response cache.
+
+    `route_ttls` overrides `ttl` by route template; a TTL of 0 disables
+    caching for a route while still coalescing concurrent identical GETs.
+    """
+
+    ttl: float = 5
+    route_ttls: dict[str, float] = field(default_factory=dict)
+    max_bytes: int = 16 * 1024 * 1024
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    coalesced: int
+    revalidated: int
+    evictions: int
+
+
+class _Entry:
+    __slots__ = ("path", "response", "etag", "size", "expires")
+
+    def __init__(
+        self, path: str, response: ClientResponse, size: int, expires: float
+    ) -> None:
+        self.path = path
+        self.response = response
+        self.etag = response.headers.get("ETag")
+        self.size = size
+        self.expires = expires
+
+
+def _retrieve(task: Task) -> None:
+    # Mark failures as retrieved when every caller has been cancelled.
+    if not task.cancelled():
+        task.exception()
+
+
+def _ancestors(path: str) -> list[str]:
+    parts = path.rstrip("/").split("/")
+    return ["/".join(parts[:i]) for i in range(2, len(parts) + 1)]
+
+
+class ResponseCache:
+    """Caches GET responses by route template, path and query parameters.
+
+    Concurrent identical GETs share one request. Responses are kept for
+    their route's TTL in an LRU bounded by `max_bytes` of body, revalidated
+    with `If-None-Match` once stale if they carried an ETag, and dropped when
+    a mutating request is sent for their path or a parent path.
+    """
+
+    def __init__(self, config: CacheConfig) -> None:
+        self.config = config
+
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._by_path: dict[str, set[CacheKey]] = {}
+        self._inflight: dict[CacheKey, Task] = {}
+
+        self._bytes = 0
+        self._epoch = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._revalidated = 0
+        self._evictions = 0
+
+    def _key(
+        self, route: Route, qparams: Optional[dict[str, Union[str, int]]]
+    ) -> CacheKey:
+        return route.template, route.path, tuple(sorted((qparams or {}).items()))
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+        if keys := self._by_path.get(entry.path):
+            keys.discard(key)
+
+            if not keys:
+                del self._by_path[entry.path]
+
+    def _store(self, key: CacheKey, entry: _Entry) -> None:
+        if key in self._entries:
+            self._drop(key)
+
+        if entry.size > self.config.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self._by_path.setdefault(entry.path, set()).add(key)
+        self._bytes += entry.size
+
+        while self._bytes > self.config.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self._evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        """Drop cached responses for a path and every parent path of it."""
+
+        self._epoch += 1
+
+        for ancestor in _ancestors(path):
+            for key in list(self._by_path.get(ancestor, ())):
+                self._drop(key)
+
+    async def fetch(
+        self,
+        route: Route,
+        qparams: Optional[dict[str, Union[str, int]]],
+        send: Callable[[dict[str, str]], Awaitable[ClientResponse]],
+    ) -> ClientResponse:
+        key = self._key(route, qparams)
+        entry = self._entries.get(key)
+
+        if entry and entry.expires > monotonic():
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return entry.response
+
+        if task := self._inflight.get(key):
+            self._coalesced += 1
+            return await shield(task)
+
+        self._misses += 1
+
+        # The request runs in its own task, so a cancelled caller does not
+        # cancel it for the callers coalesced onto it.
+        load = self._load(key, route, entry, send, self._epoch)
+        task = self._inflight[key] = create_task(load)
+        task.add_done_callback(_retrieve)
+
+        return await shield(task)
+
+    async def _load(
+        self,
+        key: CacheKey,
+        route: Route,
+        entry: Optional[_Entry],
+        send: Callable[[dict[str, str]], Awaitable[ClientResponse]],
+        epoch: int,
+    ) -> ClientResponse:
+        try:
+            response = await send(
+                {"If-None-Match": entry.etag} if entry and entry.etag else {}
+            )
+            ttl = self.config.route_ttls.get(route.template, self.config.ttl)
+
+            if response.status == 304 and entry:
+                self._revalidated += 1
+                response.release()
+
+                entry.expires = monotonic() + ttl
+                return entry.response
+
+            body = await response.read()
+
+            if ttl > 0 and epoch == self._epoch:
+                self._store(
+                    key, _Entry(route.path, response, len(body), monotonic() + ttl)
+                )
+
+            return response
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            len(self._entries),
+            self._bytes,
+            self._hits,
+            self._misses,
+            self._coalesced,
+            self._revalidated,
+            self._evictions,
+        )
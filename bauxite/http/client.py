@@ -1,15 +1,31 @@
 from __future__ import annotations
 
-from asyncio import create_task, sleep
+from asyncio import create_task, gather, sleep
 from collections import defaultdict
 from dataclasses import dataclass
-from json import dumps
-from typing import Any, Awaitable, Callable, Mapping, Optional, Sequence, Type, Union
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
 
 from aiohttp import BasicAuth, ClientResponse, ClientSession, FormData
 
+from bauxite.codec import JSONCodec, default_codec
 from bauxite.constants import API_URL, VERSION
+from bauxite.metrics import MetricsRegistry
 
+from .bulk import ProgressCallback, schedule_by_bucket
+from .cache import CacheConfig, CacheStats, ResponseCache
 from .errors import (
     BadGateway,
     BadRequest,
@@ -25,13 +41,42 @@ from .errors import (
     UnprocessableEntity,
 )
 from .file import File
-from .ratelimiting import LocalRateLimiter, RateLimiter
+from .ipc import IPCRateLimiter
+from .metrics import HTTPMetrics
+from .paginate import Cursor, iter_paginated
+from .pool import PoolConfig, PoolStats, pool_stats
+from .ratelimiting import (
+    GlobalRateLimiter,
+    LocalGlobalRateLimiter,
+    LocalRateLimiter,
+    RateLimiter,
+)
 from .route import Route
+from .stream import iter_json_array, save_to_file
+from .tracing import RequestSpan, RequestTracer
 
 Callback = Callable[[ClientResponse, Route], Awaitable[None]]
 Unset = object()
 
 
+@dataclass
+class RequestSpec:
+    route: Route
+    qparams: Optional[dict[str, Union[str, int]]] = None
+    reason: Optional[str] = None
+    files: Optional[Sequence[File]] = None
+    json: Optional[Any] = Unset
+    max_attempts: int = 3
+
+
+@dataclass
+class BulkResult:
+    index: int
+    spec: RequestSpec
+    response: Optional[ClientResponse] = None
+    error: Optional[Exception] = None
+
+
 @dataclass
 class _RequestContext:
     route: Route
@@ -39,6 +84,7 @@ class _RequestContext:
     params: dict[str, Any]
     files: Sequence[File]
     json: Any
+    span: Optional[RequestSpan] = None
 
 
 @dataclass
@@ -77,6 +123,14 @@ class HTTPClient:
         on_success: Optional[set[Callback]] = None,
         on_error: Optional[set[Callback]] = None,
         on_ratelimit: Optional[set[Callback]] = None,
+        codec: Optional[JSONCodec] = None,
+        global_ratelimiter: Optional[GlobalRateLimiter] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        tracer: Optional[RequestTracer] = None,
+        pool: Optional[PoolConfig] = None,
+        gateway_pool: Optional[PoolConfig] = None,
+        download_pool: Optional[PoolConfig] = None,
+        cache: Optional[CacheConfig] = None,
     ) -> None:
         self._token = token.strip()
         self._api_url = api_url or API_URL
@@ -87,8 +141,30 @@ class HTTPClient:
         self._proxy_url = proxy_url
         self._proxy_auth = proxy_auth
         self._ratelimiter = ratelimiter or LocalRateLimiter()
+        # Rate limiters may optionally learn Discord's bucket hashes.
+        self._update_bucket = getattr(self._ratelimiter, "update_bucket", None)
+
+        # Processes sharing a rate limit server share its global pacing too.
+        if not global_ratelimiter and isinstance(self._ratelimiter, IPCRateLimiter):
+            global_ratelimiter = self._ratelimiter
+
+        self._global_ratelimiter = global_ratelimiter or LocalGlobalRateLimiter()
+        self._codec = codec or default_codec()
+        self._metrics = HTTPMetrics(metrics) if metrics else None
+        self._tracer = tracer
+
+        self._pool = pool or PoolConfig()
+        self._gateway_pool = gateway_pool or PoolConfig(limit=0)
+        self._download_pool = download_pool or PoolConfig(limit=10)
 
         self.__session: Optional[ClientSession] = None
+        self.__gateway_session: Optional[ClientSession] = None
+        self.__download_session: Optional[ClientSession] = None
+
+        self._cache = ResponseCache(cache) if cache else None
+
+        if metrics:
+            metrics.add_collector(self._collect_pool_metrics)
 
         self._on_success = on_success or set()
         self._on_error = on_error or set()
@@ -100,14 +176,79 @@ class HTTPClient:
             return self.__session
 
         self.__session = ClientSession(
+            connector=self._pool.connector(),
             headers={
                 "Authorization": f"Bot {self._token}",
                 "User-Agent": self._user_agent,
-            }
+            },
+            trace_configs=[self._tracer.trace_config()] if self._tracer else None,
         )
 
         return self.__session
 
+    @property
+    def _gateway_session(self) -> ClientSession:
+        """A separate, unauthenticated session for gateway websockets, so that
+        long-lived connections never take up the REST connection pool."""
+
+        if self.__gateway_session and not self.__gateway_session.closed:
+            return self.__gateway_session
+
+        self.__gateway_session = ClientSession(
+            connector=self._gateway_pool.connector()
+        )
+
+        return self.__gateway_session
+
+    @property
+    def _download_session(self) -> ClientSession:
+        """An unauthenticated session for downloads, with its own bounded
+        pool so that they neither starve REST requests nor open unbounded
+        connections."""
+
+        if self.__download_session and not self.__download_session.closed:
+            return self.__download_session
+
+        self.__download_session = ClientSession(
+            connector=self._download_pool.connector()
+        )
+
+        return self.__download_session
+
+    def pool_stats(self) -> dict[str, PoolStats]:
+        sessions = {
+            "rest": self.__session,
+            "gateway": self.__gateway_session,
+            "download": self.__download_session,
+        }
+
+        return {
+            name: pool_stats(session.connector if session else None)
+            for name, session in sessions.items()
+        }
+
+    def _collect_pool_metrics(self) -> None:
+        assert self._metrics, "Pool metrics collected without a metrics registry."
+
+        for name, stats in self.pool_stats().items():
+            self._metrics.pool.set(stats.in_use, name, "in_use")
+            self._metrics.pool.set(stats.idle, name, "idle")
+            self._metrics.pool.set(stats.waiting, name, "waiting")
+
+    async def _warm_connection(self) -> None:
+        await self._global_ratelimiter.wait()
+
+        async with self._session.get(self._api_url + "/gateway") as response:
+            await response.read()
+
+    async def warm_up(self, connections: Optional[int] = None) -> None:
+        """Open keep-alive connections to the API ahead of the first requests,
+        so they do not pay for a TLS handshake."""
+
+        count = self._pool.warmup if connections is None else connections
+
+        await gather(*(self._warm_connection() for _ in range(count)))
+
     def _dispatch(self, listeners: set[Callback], ctx: _ResponseContext) -> None:
         for listener in listeners:
             create_task(listener(ctx.response, ctx.route))
@@ -125,70 +266,165 @@ class HTTPClient:
 
             if ctx.json is not Unset:
                 data.add_field(
-                    "payload_json", dumps(ctx.json), content_type="application/json"
+                    "payload_json",
+                    self._codec.dumps(ctx.json).decode(),
+                    content_type="application/json",
                 )
 
             ctx.params["data"] = data
         elif ctx.json is not Unset:
-            ctx.params["json"] = ctx.json
+            ctx.headers["Content-Type"] = "application/json"
+            ctx.params["data"] = self._codec.dumps(ctx.json)
+
+        metrics = self._metrics
+        span = ctx.span
+        labels = (ctx.route.method, ctx.route.template)
+
+        if timed := bool(metrics or span):
+            started = perf_counter()
+
+        await self._global_ratelimiter.wait(ctx.route.global_exempt)
+
+        if timed:
+            waited = perf_counter()
 
         lock = await self._ratelimiter.acquire(ctx.route.bucket)
 
+        if timed:
+            acquired = perf_counter()
+
         async with lock:
-            response = await self._session.request(
-                ctx.route.method,
-                self._api_url + ctx.route.path,
-                headers=ctx.headers,
-                **ctx.params,
-            )
+            if timed:
+                locked = perf_counter()
+
+            # Every path out of the lock, including errors raised by callbacks
+            # or while reading the body, must release it.
+            release_after = 0.0
+
+            try:
+                response = await self._session.request(
+                    ctx.route.method,
+                    self._api_url + ctx.route.path,
+                    headers=ctx.headers,
+                    trace_request_ctx=span,
+                    **ctx.params,
+                )
 
-            status = response.status
-            headers = response.headers
+                status = response.status
+                headers = response.headers
+
+                if metrics:
+                    metrics.global_wait.observe(waited - started)
+                    metrics.bucket_wait.observe(locked - waited, *labels)
+                    metrics.request_time.observe(perf_counter() - locked, *labels)
+                    metrics.requests.inc(*labels, str(status))
+
+                if span:
+                    span.global_wait = waited - started
+                    span.acquire = acquired - waited
+                    span.bucket_wait = locked - acquired
+                    span.status = status
+
+                # 304 only answers the cache's conditional GETs.
+                successful = 200 <= status < 300 or status == 304
+                response_ctx = _ResponseContext(ctx.route, response, successful)
+
+                rl_reset_after = float(headers.get("X-RateLimit-Reset-After", 0))
+                rl_bucket_remaining = int(headers.get("X-RateLimit-Remaining", 1))
+
+                # Updating from headers is optional for bucket locks.
+                update = getattr(lock, "update", None)
+
+                if update and (rl_limit := headers.get("X-RateLimit-Limit")):
+                    update(int(rl_limit), rl_bucket_remaining, rl_reset_after)
+
+                if self._update_bucket and (
+                    rl_bucket_hash := headers.get("X-RateLimit-Bucket")
+                ):
+                    await self._update_bucket(
+                        ctx.route.bucket, rl_bucket_hash, ctx.route.major
+                    )
+
+                if response_ctx.successful:
+                    self._dispatch(self._on_success, response_ctx)
+                    if rl_bucket_remaining == 0:
+                        self._dispatch(self._on_ratelimit, response_ctx)
+                        release_after = rl_reset_after
+                    return response_ctx
+                elif status == 429:
+                    self._dispatch(self._on_error, response_ctx)
+                    self._dispatch(self._on_ratelimit, response_ctx)
+                    if not headers.get("Via"):
+                        if metrics:
+                            metrics.ratelimited.inc(*labels, "cloudflare")
 
-            response_ctx = _ResponseContext(ctx.route, response, 200 <= status < 300)
+                        raise TooManyRequests(response)
 
-            rl_reset_after = float(headers.get("X-RateLimit-Reset-After", 0))
-            rl_bucket_remaining = int(headers.get("X-RateLimit-Remaining", 1))
+                    json = await self.read_json(response)
 
-            if response_ctx.successful:
-                self._dispatch(self._on_success, response_ctx)
-                if rl_bucket_remaining == 0:
-                    self._dispatch(self._on_ratelimit, response_ctx)
-                    await lock.release(rl_reset_after)
+                    is_global = json.get("global", False)
+                    retry_after = json["retry_after"]
+
+                    if metrics:
+                        scope = "global" if is_global else "bucket"
+                        metrics.ratelimited.inc(*labels, scope)
+
+                    if is_global:
+                        await self._ratelimiter.lock_globally(retry_after)
+                    else:
+                        release_after = retry_after
                 else:
-                    await lock.release(0)
+                    self._dispatch(self._on_error, response_ctx)
+                    raise self._status_codes[status](response)
+
                 return response_ctx
-            elif status == 429:
-                self._dispatch(self._on_error, response_ctx)
-                self._dispatch(self._on_ratelimit, response_ctx)
-                if not headers.get("Via"):
-                    raise TooManyRequests(response)
+            finally:
+                await lock.release(release_after)
 
-                json = await response.json()
+    async def read_json(self, response: ClientResponse) -> Any:
+        return self._codec.loads(await response.read())
 
-                is_global = json.get("global", False)
-                retry_after = json["retry_after"]
+    def stream_json(
+        self,
+        response: ClientResponse,
+        chunk_size: int = 64 * 1024,
+        max_item_size: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        """Iterate over the items of a JSON array response as they arrive,
+        without reading the whole body into memory."""
 
-                if is_global:
-                    await self._ratelimiter.lock_globally(retry_after)
-                else:
-                    await lock.release(retry_after)
-            else:
-                self._dispatch(self._on_error, response_ctx)
-                raise self._status_codes[status](response)
+        return iter_json_array(response, self._codec, chunk_size, max_item_size)
 
-            return response_ctx
+    async def save(
+        self, response: ClientResponse, path: str, chunk_size: int = 64 * 1024
+    ) -> int:
+        return await save_to_file(response, path, chunk_size)
 
-    async def request(
+    async def download(self, url: str, path: str, chunk_size: int = 64 * 1024) -> int:
+        """Stream an attachment or CDN asset to a file, returning its size.
+
+        The download is made without the bot's Authorization header, so the
+        token is never sent to hosts other than the API.
+        """
+
+        response = await self._download_session.get(url)
+
+        if not response.ok:
+            response.release()
+            raise self._status_codes[response.status](response)
+
+        return await save_to_file(response, path, chunk_size)
+
+    async def _send(
         self,
         route: Route,
-        qparams: Optional[dict[str, Union[str, int]]] = None,
-        reason: Optional[str] = None,
-        files: Optional[Sequence[File]] = None,
-        json: Optional[Any] = Unset,
-        max_attempts: int = 3,
+        qparams: Optional[dict[str, Union[str, int]]],
+        reason: Optional[str],
+        files: Optional[Sequence[File]],
+        json: Optional[Any],
+        max_attempts: int,
+        headers: dict[str, str],
     ) -> ClientResponse:
-        headers = {}
         params = {}
 
         if qparams:
@@ -197,9 +433,26 @@ class HTTPClient:
         if reason:
             headers["X-Audit-Log-Reason"] = reason
 
+        tracer = self._tracer if self._tracer and self._tracer.sample() else None
+        retry_delay = 0
+
         for attempt in range(max_attempts):
             ctx = _RequestContext(route, headers, params, files or (), json)
-            resp = await self._request(ctx, attempt)
+
+            if tracer:
+                ctx.span = tracer.start(route, attempt, retry_delay)
+                began = perf_counter()
+
+            try:
+                resp = await self._request(ctx, attempt)
+            except Exception as e:
+                if tracer and ctx.span:
+                    ctx.span.error = type(e).__name__
+                    tracer.finish(ctx.span, began)
+                raise
+
+            if tracer and ctx.span:
+                tracer.finish(ctx.span, began)
 
             if resp.successful:
                 return resp.response
@@ -207,10 +460,122 @@ class HTTPClient:
             if attempt == max_attempts - 1:
                 raise self._status_codes[resp.response.status](resp.response)
 
-            await sleep(1 + attempt * 2)
+            if self._metrics:
+                self._metrics.retries.inc(route.method, route.template)
+
+            retry_delay = 1 + attempt * 2
+            await sleep(retry_delay)
 
         raise Exception("Unreachable")
 
+    async def request(
+        self,
+        route: Route,
+        qparams: Optional[dict[str, Union[str, int]]] = None,
+        reason: Optional[str] = None,
+        files: Optional[Sequence[File]] = None,
+        json: Optional[Any] = Unset,
+        max_attempts: int = 3,
+    ) -> ClientResponse:
+        if not self._cache:
+            return await self._send(
+                route, qparams, reason, files, json, max_attempts, {}
+            )
+
+        if route.method == "GET":
+            return await self._cache.fetch(
+                route,
+                qparams,
+                lambda headers: self._send(
+                    route, qparams, reason, files, json, max_attempts, headers
+                ),
+            )
+
+        # Invalidate on both sides so a GET racing the mutation is not kept.
+        self._cache.invalidate(route.path)
+
+        try:
+            return await self._send(
+                route, qparams, reason, files, json, max_attempts, {}
+            )
+        finally:
+            self._cache.invalidate(route.path)
+
+    def _request_spec(self, spec: RequestSpec) -> Awaitable[ClientResponse]:
+        return self.request(
+            spec.route,
+            spec.qparams,
+            spec.reason,
+            spec.files,
+            spec.json,
+            spec.max_attempts,
+        )
+
+    async def request_many(
+        self,
+        specs: Union[Iterable[RequestSpec], AsyncIterable[RequestSpec]],
+        concurrency: int = 16,
+        per_bucket: int = 1,
+        progress: Optional[ProgressCallback] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """Make many requests, yielding results as they complete.
+
+        Requests for different buckets run in parallel, with at most
+        `per_bucket` in flight for any one bucket. A failed request yields a
+        result with `error` set rather than raising. Closing the iterator
+        cancels the requests still in flight.
+        """
+
+        results = schedule_by_bucket(
+            specs,
+            lambda spec: spec.route.bucket,
+            self._request_spec,
+            concurrency,
+            per_bucket,
+            progress,
+        )
+
+        try:
+            async for index, spec, response, error in results:
+                yield BulkResult(index, spec, response, error)
+        finally:
+            await results.aclose()
+
+    async def _fetch_page(
+        self, route: Route, qparams: dict[str, Union[str, int]]
+    ) -> Any:
+        return await self.read_json(await self.request(route, qparams))
+
+    def paginate(
+        self,
+        route: Route,
+        cursor: Cursor,
+        qparams: Optional[dict[str, Union[str, int]]] = None,
+        start: Optional[int] = None,
+        limit: Optional[int] = None,
+        prefetch: int = 1,
+    ) -> AsyncIterator[Any]:
+        """Iterate over the items of a paginated GET route, fetching the next
+        pages while the caller processes the current one."""
+
+        return iter_paginated(
+            lambda params: self._fetch_page(route, params),
+            cursor,
+            qparams,
+            start,
+            limit,
+            prefetch,
+        )
+
+    def cache_stats(self) -> Optional[CacheStats]:
+        return self._cache.stats() if self._cache else None
+
     async def close(self) -> None:
         if self.__session:
             await self.__session.close()
+
+        if self.__gateway_session:
+            await self.__gateway_session.close()
+
+        if self.__download_session:
+            await self.__download_session.close()
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from asyncio import (
+    AbstractServer,
+    CancelledError,
+    Future,
+    Lock,
+    StreamReader,
+    StreamWriter,
+    Task,
+    create_task,
+    get_running_loop,
+    open_unix_connection,
+    start_unix_server,
+)
+from itertools import count
+from os import path, unlink
+from typing import Optional
+
+from .ratelimiting import (
+    BucketLock,
+    GlobalRateLimiter,
+    LocalGlobalRateLimiter,
+    LocalRateLimiter,
+    RateLimiter,
+)
+
+
+class RateLimitServer:
+    """A rate limit coordinator shared by every process on a host.
+
+    Buckets are kept in a single `RateLimiter` (a `LocalRateLimiter` by
+    default) and handed out to `IPCRateLimiter` clients over a unix socket.
+    Requests are paced under the global rate limit by a single
+    `GlobalRateLimiter`, so the budget is shared rather than per process.
+    Locks held by a client that disconnects are released immediately.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        limiter: Optional[RateLimiter] = None,
+        global_limiter: Optional[GlobalRateLimiter] = None,
+    ) -> None:
+        self._path = socket_path
+        self._limiter = limiter or LocalRateLimiter()
+        self._global_limiter = global_limiter or LocalGlobalRateLimiter()
+        self._update_bucket = getattr(self._limiter, "update_bucket", None)
+
+        self._server: Optional[AbstractServer] = None
+
+    async def _acquire(
+        self,
+        writer: StreamWriter,
+        held: dict[str, BucketLock],
+        request_id: str,
+        bucket: str,
+    ) -> None:
+        lock = await self._limiter.acquire(bucket)
+        await lock.__aenter__()
+
+        if writer.is_closing():
+            await lock.release(0)
+            return
+
+        held[request_id] = lock
+        writer.write(f"{request_id}\n".encode())
+
+    async def _wait_global(self, writer: StreamWriter, request_id: str) -> None:
+        await self._global_limiter.wait()
+
+        if not writer.is_closing():
+            writer.write(f"{request_id}\n".encode())
+
+    async def _handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        held: dict[str, BucketLock] = {}
+        acquiring: dict[str, Task] = {}
+        pending: set[Task] = set()
+
+        try:
+            while line := await reader.readline():
+                command, _, args = line.decode().rstrip("\n").partition(" ")
+
+                if command == "A":
+                    request_id, _, bucket = args.partition(" ")
+
+                    task = create_task(self._acquire(writer, held, request_id, bucket))
+                    acquiring[request_id] = task
+                    task.add_done_callback(lambda _, id=request_id: acquiring.pop(id))
+                elif command == "W":
+                    task = create_task(self._wait_global(writer, args))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif command == "R":
+                    request_id, _, after = args.partition(" ")
+
+                    if lock := held.pop(request_id, None):
+                        await lock.release(float(after))
+                    elif task := acquiring.get(request_id):
+                        # The client gave up before the lock was granted.
+                        task.cancel()
+                elif command == "G":
+                    await self._limiter.lock_globally(float(args))
+                elif command == "H" and self._update_bucket:
+                    bucket_hash, major, bucket = args.split(" ", 2)
+                    await self._update_bucket(bucket, bucket_hash, major)
+        finally:
+            writer.close()
+
+            for task in (*pending, *acquiring.values()):
+                task.cancel()
+
+            for lock in held.values():
+                await lock.release(0)
+
+    async def start(self) -> None:
+        if path.exists(self._path):
+            unlink(self._path)
+
+        self._server = await start_unix_server(self._handle, self._path)
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+        if path.exists(self._path):
+            unlink(self._path)
+
+
+class IPCBucketLock:
+    def __init__(self, limiter: IPCRateLimiter, bucket: str) -> None:
+        self._limiter = limiter
+        self._bucket = bucket
+        self._id: Optional[int] = None
+
+    async def __aenter__(self) -> "IPCBucketLock":
+        self._id = await self._limiter._acquire(self._bucket)
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        pass
+
+    async def release(self, after: float = 0) -> None:
+        assert self._id is not None, "Bucket lock released before it was acquired."
+
+        self._limiter._send(f"R {self._id} {after}\n")
+        self._id = None
+
+    def locked(self) -> bool:
+        return self._id is not None
+
+
+class IPCRateLimiter:
+    """A RateLimiter and GlobalRateLimiter backed by a `RateLimitServer` over
+    a unix socket.
+
+    Every `HTTPClient` on a host using the same socket shares bucket and
+    global state, including the global request pacing. Each acquire and each
+    global wait costs one round trip; releases and global locks are sent
+    without waiting for a reply.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        self._path = socket_path
+
+        self._writer: Optional[StreamWriter] = None
+        self._reader_task: Optional[Task] = None
+        self._connect_lock = Lock()
+
+        self._ids = count()
+        self._waiters: dict[int, Future] = {}
+
+    async def _connect(self) -> StreamWriter:
+        async with self._connect_lock:
+            if self._writer and not self._writer.is_closing():
+                return self._writer
+
+            reader, self._writer = await open_unix_connection(self._path)
+            self._reader_task = create_task(self._read(reader, self._writer))
+
+            return self._writer
+
+    async def _read(self, reader: StreamReader, writer: StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                waiter = self._waiters.pop(int(line), None)
+
+                if waiter and not waiter.done():
+                    waiter.set_result(None)
+        finally:
+            # Close the connection so the next call reconnects rather than
+            # waiting for replies nobody reads.
+            writer.close()
+
+            error = ConnectionError("Rate limit server closed the connection.")
+
+            for waiter in self._waiters.values():
+                if not waiter.done():
+                    waiter.set_exception(error)
+
+            self._waiters.clear()
+
+    def _send(self, message: str) -> None:
+        if self._writer and not self._writer.is_closing():
+            self._writer.write(message.encode())
+
+    async def _call(self, command: str, *args: str) -> int:
+        writer = self._writer
+
+        if not writer or writer.is_closing():
+            writer = await self._connect()
+
+        request_id = next(self._ids)
+        waiter = get_running_loop().create_future()
+
+        self._waiters[request_id] = waiter
+        writer.write(" ".join((command, str(request_id), *args)).encode() + b"\n")
+
+        try:
+            await waiter
+        except CancelledError:
+            self._waiters.pop(request_id, None)
+
+            # Release the lock whether it was already granted or arrives later.
+            if command == "A":
+                self._send(f"R {request_id} 0\n")
+            raise
+
+        return request_id
+
+    async def _acquire(self, bucket: str) -> int:
+        return await self._call("A", bucket)
+
+    async def wait(self, exempt: bool = False) -> None:
+        if not exempt:
+            await self._call("W")
+
+    async def acquire(self, bucket: str) -> BucketLock:
+        return IPCBucketLock(self, bucket)
+
+    async def lock_globally(self, release_after: float) -> None:
+        if not self._writer or self._writer.is_closing():
+            await self._connect()
+
+        self._send(f"G {release_after}\n")
+
+    async def update_bucket(self, bucket: str, bucket_hash: str, major: str) -> None:
+        self._send(f"H {bucket_hash} {major} {bucket}\n")
+
+    async def close(self) -> None:
+        if self._writer:
+            self._writer.close()
+
+        if self._reader_task:
+            self._reader_task.cancel()
@@ -0,0 +1,41 @@
+from bauxite.metrics import MetricsRegistry
+
+
+class HTTPMetrics:
+    """The REST instruments, shared by every client using a registry."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.requests = registry.counter(
+            "bauxite_http_requests_total",
+            "REST requests made, by route template and response status.",
+            ("method", "route", "status"),
+        )
+        self.request_time = registry.histogram(
+            "bauxite_http_request_seconds",
+            "Time from sending a REST request to receiving its response headers.",
+            ("method", "route"),
+        )
+        self.bucket_wait = registry.histogram(
+            "bauxite_http_bucket_wait_seconds",
+            "Time spent waiting for a rate limit bucket.",
+            ("method", "route"),
+        )
+        self.global_wait = registry.histogram(
+            "bauxite_http_global_wait_seconds",
+            "Time spent waiting for the global rate limit.",
+        )
+        self.ratelimited = registry.counter(
+            "bauxite_http_ratelimited_total",
+            "429 responses, by route template and rate limit scope.",
+            ("method", "route", "scope"),
+        )
+        self.pool = registry.gauge(
+            "bauxite_http_pool_connections",
+            "Pooled connections in use, idle, and requests waiting for one.",
+            ("pool", "state"),
+        )
+        self.retries = registry.counter(
+            "bauxite_http_retries_total",
+            "REST requests retried after an unsuccessful attempt.",
+            ("method", "route"),
+        )
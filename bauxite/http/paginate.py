@@ -0,0 +1,154 @@
+from asyncio import Queue, create_task, gather
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+
+PageFetcher = Callable[[dict[str, Union[str, int]]], Awaitable[Any]]
+
+_DONE = object()
+
+
+def _id(item: Any) -> Union[str, int]:
+    return item["id"]
+
+
+def _user_id(item: Any) -> Union[str, int]:
+    return item["user"]["id"]
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """How an endpoint is paged through.
+
+    `param` is the query parameter the cursor is sent as, `page_size` the
+    largest `limit` the endpoint accepts, `key` the snowflake of an item and
+    `items` the key of the item list when the body is an object.
+    """
+
+    param: Literal["before", "after"]
+    page_size: int
+    key: Callable[[Any], Union[str, int]] = _id
+    items: Optional[str] = None
+
+    def next(self, page: list[Any]) -> int:
+        ids = [int(self.key(item)) for item in page]
+        return min(ids) if self.param == "before" else max(ids)
+
+
+MESSAGES_BEFORE = Cursor("before", 100)
+MESSAGES_AFTER = Cursor("after", 100)
+MEMBERS_AFTER = Cursor("after", 1000, _user_id)
+BANS_BEFORE = Cursor("before", 1000, _user_id)
+BANS_AFTER = Cursor("after", 1000, _user_id)
+AUDIT_LOG_BEFORE = Cursor("before", 100, items="audit_log_entries")
+
+
+async def _pages(
+    fetch: PageFetcher,
+    cursor: Cursor,
+    qparams: Optional[dict[str, Union[str, int]]],
+    start: Optional[int],
+    limit: Optional[int],
+) -> AsyncIterator[list[Any]]:
+    # Without a cursor `after` pages would start from the newest item.
+    position = 0 if start is None and cursor.param == "after" else start
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        size = cursor.page_size
+
+        if remaining is not None:
+            size = min(size, remaining)
+
+        params = {**(qparams or {}), "limit": size}
+
+        if position is not None:
+            params[cursor.param] = position
+
+        body = await fetch(params)
+        page = body[cursor.items] if cursor.items else body
+
+        if not page:
+            return
+
+        yield page
+
+        if len(page) < size:
+            return
+
+        position = cursor.next(page)
+
+        if remaining is not None:
+            remaining -= len(page)
+
+
+async def _prefetch(source: AsyncIterator[T], depth: int) -> AsyncIterator[T]:
+    if depth < 1:
+        async for value in source:
+            yield value
+
+        return
+
+    queue: Queue[tuple[Any, Optional[BaseException]]] = Queue(depth)
+
+    async def produce() -> None:
+        try:
+            async for value in source:
+                await queue.put((value, None))
+        except Exception as e:
+            await queue.put((None, e))
+        else:
+            await queue.put((_DONE, None))
+
+    task = create_task(produce())
+
+    try:
+        while True:
+            value, error = await queue.get()
+
+            if error:
+                raise error
+
+            if value is _DONE:
+                return
+
+            yield value
+    finally:
+        task.cancel()
+        await gather(task, return_exceptions=True)
+
+
+async def iter_paginated(
+    fetch: PageFetcher,
+    cursor: Cursor,
+    qparams: Optional[dict[str, Union[str, int]]] = None,
+    start: Optional[int] = None,
+    limit: Optional[int] = None,
+    prefetch: int = 1,
+) -> AsyncIterator[Any]:
+    """Yield the items of a paginated endpoint, fetching up to `prefetch`
+    pages ahead of the caller.
+
+    Each page's cursor comes from the page before it, so pages are fetched
+    one at a time through the route's bucket; prefetching overlaps fetching
+    with the caller's processing rather than adding concurrent requests.
+    """
+
+    pages = _prefetch(_pages(fetch, cursor, qparams, start, limit), prefetch)
+
+    try:
+        async for page in pages:
+            for item in page:
+                yield item
+    finally:
+        await pages.aclose()
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from aiohttp import BaseConnector, TCPConnector
+
+
+@dataclass
+class PoolConfig:
+    """Connection pool settings for one of the client's sessions.
+
+    `limit` and `limit_per_host` of 0 mean no limit. `warmup` is the number
+    of keep-alive connections `HTTPClient.warm_up` opens by default.
+    """
+
+    limit: int = 100
+    limit_per_host: int = 0
+    keepalive_timeout: float = 15
+    use_dns_cache: bool = True
+    ttl_dns_cache: Optional[int] = 10
+    warmup: int = 0
+
+    def connector(self) -> TCPConnector:
+        return TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=self.use_dns_cache,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+
+
+@dataclass
+class PoolStats:
+    in_use: int
+    idle: int
+    waiting: int
+    limit: int
+
+
+def pool_stats(connector: Optional[BaseConnector]) -> PoolStats:
+    """Read the utilisation of a connector.
+
+    aiohttp has no public API for this, so its internal bookkeeping is read
+    defensively; missing internals read as zero.
+    """
+
+    if not connector or connector.closed:
+        return PoolStats(0, 0, 0, connector.limit if connector else 0)
+
+    acquired = getattr(connector, "_acquired", ())
+    conns = getattr(connector, "_conns", {})
+    waiters = getattr(connector, "_waiters", {})
+
+    return PoolStats(
+        len(acquired),
+        sum(len(idle) for idle in conns.values()),
+        sum(len(waiting) for waiting in waiters.values()),
+        connector.limit,
+    )
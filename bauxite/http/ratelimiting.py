@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-from asyncio import Event, Lock, create_task, sleep
-from typing import Protocol
+from asyncio import CancelledError, Event, Future, Lock, get_running_loop, sleep
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from itertools import islice
+from time import monotonic
+from typing import Any, Optional, Protocol
+
+from bauxite.timer import TimerEntry, get_scheduler
 
 
 class BucketLock(Protocol):
@@ -14,6 +20,9 @@ class BucketLock(Protocol):
     async def release(self, after: float = 0) -> None:
         ...
 
+    def locked(self) -> bool:
+        ...
+
 
 class RateLimiter(Protocol):
     async def acquire(self, bucket: str) -> BucketLock:
@@ -23,14 +32,30 @@ class RateLimiter(Protocol):
         ...
 
 
+class GlobalRateLimiter(Protocol):
+    async def wait(self, exempt: bool = False) -> None:
+        ...
+
+
+@dataclass
+class BucketTableStats:
+    buckets: int
+    hashes: int
+    evictions: int
+
+
+@dataclass
+class GlobalLimiterStats:
+    requests: int
+    exempt: int
+    waits: int
+    wait_time: float
+
+
 class LocalBucketLock:
     def __init__(self) -> None:
         self._lock = Lock()
 
-    async def _release(self, after: float) -> None:
-        await sleep(after)
-        self._lock.release()
-
     async def __aenter__(self) -> "LocalBucketLock":
         await self._lock.acquire()
         return self
@@ -39,28 +64,334 @@ class LocalBucketLock:
         pass
 
     async def release(self, after: float = 0) -> None:
-        create_task(self._release(after))
+        if after > 0:
+            get_scheduler().call_later(after, self._lock.release)
+        else:
+            self._lock.release()
 
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+
+class TokenBucketLock:
+    """A bucket lock admitting as many concurrent requests as the bucket has
+    remaining, according to the last `X-RateLimit-*` headers seen.
+
+    Until the bucket's limits are known, requests are serialized. `HTTPClient`
+    passes the headers to any bucket lock with an `update` method.
+    """
 
-class LocalRateLimiter:
     def __init__(self) -> None:
-        self.buckets: dict[str, BucketLock] = {}
+        self.limit: Optional[int] = None
+        self.remaining = 1
+
+        self._reset_at = 0.0
+        self._blocked_until = 0.0
+        self._inflight = 0
+
+        self._waiters: deque[Future] = deque()
+        self._timer: Optional[TimerEntry] = None
+
+    def _slots(self, now: float) -> int:
+        if now < self._blocked_until:
+            return 0
+
+        if self.limit is None:
+            return 1 - self._inflight
+
+        if now >= self._reset_at:
+            self.remaining = self.limit
+
+        return self.remaining - self._inflight
+
+    def _wake(self) -> None:
+        now = monotonic()
+        slots = self._slots(now)
+
+        while self._waiters and slots > 0:
+            waiter = self._waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                slots -= 1
+
+        if self._waiters and not self._timer:
+            wake_at = max(self._blocked_until, now)
+
+            if self.limit is not None and self.remaining <= self._inflight:
+                wake_at = max(wake_at, self._reset_at)
+
+            if wake_at > now:
+                self._timer = get_scheduler().call_later(
+                    wake_at - now, self._on_timer
+                )
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._wake()
+
+    async def __aenter__(self) -> "TokenBucketLock":
+        while self._slots(monotonic()) <= 0:
+            waiter = get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._wake()
+
+            try:
+                await waiter
+            except CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._wake()
+                raise
+
+        self._inflight += 1
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        pass
+
+    async def release(self, after: float = 0) -> None:
+        self._inflight -= 1
+
+        if after > 0:
+            self._blocked_until = max(self._blocked_until, monotonic() + after)
+
+        self._wake()
+
+    def locked(self) -> bool:
+        return self._inflight > 0 or monotonic() < self._blocked_until
+
+    def update(self, limit: int, remaining: int, reset_after: float) -> None:
+        reset_at = monotonic() + reset_after
+
+        if self.limit is None or reset_at > self._reset_at + 0.1:
+            self.remaining = remaining
+        else:
+            self.remaining = min(self.remaining, remaining)
+
+        self.limit = limit
+        self._reset_at = reset_at
+
+
+class _CountedLock:
+    """A bucket lock handed out by `LocalRateLimiter`, counted as in use from
+    `acquire` until it is released so that its bucket is not evicted while
+    requests are queued on it."""
+
+    __slots__ = ("_limiter", "_lock")
+
+    def __init__(self, limiter: LocalRateLimiter, lock: BucketLock) -> None:
+        self._limiter = limiter
+        self._lock = lock
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._lock, name)
+
+    async def __aenter__(self) -> "_CountedLock":
+        try:
+            await self._lock.__aenter__()
+        except BaseException:
+            self._limiter._done(self._lock)
+            raise
+
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await self._lock.__aexit__(*args, **kwargs)
+
+    async def release(self, after: float = 0) -> None:
+        try:
+            await self._lock.release(after)
+        finally:
+            self._limiter._done(self._lock)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+
+class LocalRateLimiter:
+    """A RateLimiter keeping bucket state in the current process.
+
+    Routes are keyed by their template and major parameters until Discord
+    reports their `X-RateLimit-Bucket` hash, after which every route sharing
+    that hash and major parameters shares one lock. At most `max_buckets`
+    locks are kept, and idle locks unused for `bucket_ttl` seconds are
+    evicted.
+    """
+
+    _sweep_size = 32
+    _lock_type: type = LocalBucketLock
+
+    def __init__(self, max_buckets: int = 4096, bucket_ttl: float = 600) -> None:
+        self.buckets: OrderedDict[str, BucketLock] = OrderedDict()
+
+        self._max_buckets = max_buckets
+        self._bucket_ttl = bucket_ttl
+
+        self._last_used: dict[str, float] = {}
+        self._users: dict[BucketLock, int] = {}
+        self._hashes: OrderedDict[str, str] = OrderedDict()
+        self._evictions = 0
 
         self._global = Event()
         self._global.set()
+        self._global_until = 0.0
+        self._global_timer: Optional[TimerEntry] = None
 
-    async def _lock_global(self, release_after: float) -> None:
-        self._global.clear()
-        await sleep(release_after)
-        self._global.set()
+    def _evict(self, now: float) -> None:
+        for key in list(islice(self.buckets, self._sweep_size)):
+            if (
+                len(self.buckets) <= self._max_buckets
+                and now - self._last_used[key] < self._bucket_ttl
+            ):
+                break
+
+            lock = self.buckets[key]
+
+            if lock in self._users or lock.locked():
+                self.buckets.move_to_end(key)
+                continue
+
+            del self.buckets[key]
+            del self._last_used[key]
+            self._evictions += 1
 
     async def acquire(self, bucket: str) -> BucketLock:
-        if not (lock := self.buckets.get(bucket)):
-            lock = LocalBucketLock()
-            self.buckets[bucket] = lock
+        key = self._hashes.get(bucket, bucket)
+        now = monotonic()
+
+        self._last_used[key] = now
+
+        if lock := self.buckets.get(key):
+            self.buckets.move_to_end(key)
+            self._users[lock] = self._users.get(lock, 0) + 1
+        else:
+            lock = self._lock_type()
+            self.buckets[key] = lock
+            self._users[lock] = 1
+            self._evict(now)
+
+        try:
+            await self._global.wait()
+        except BaseException:
+            self._done(lock)
+            raise
 
-        await self._global.wait()
-        return lock
+        return _CountedLock(self, lock)
+
+    def _done(self, lock: BucketLock) -> None:
+        if self._users[lock] > 1:
+            self._users[lock] -= 1
+        else:
+            del self._users[lock]
 
     async def lock_globally(self, release_after: float) -> None:
-        create_task(self._lock_global(release_after))
+        now = monotonic()
+
+        if now + release_after <= self._global_until:
+            return
+
+        self._global_until = now + release_after
+        self._global.clear()
+
+        if self._global_timer:
+            self._global_timer.cancel()
+
+        self._global_timer = get_scheduler().call_later(
+            release_after, self._global.set
+        )
+
+    async def update_bucket(self, bucket: str, bucket_hash: str, major: str) -> None:
+        key = f"{bucket_hash}:{major}"
+        previous = self._hashes.get(bucket, bucket)
+
+        if previous != key:
+            self._hashes[bucket] = key
+
+            # Carry the lock the route has been using over to its hash, so
+            # requests queued on it or waiting out its reset stay ordered
+            # with the ones that follow.
+            if key not in self.buckets and previous in self.buckets:
+                self.buckets[key] = self.buckets.pop(previous)
+                self._last_used[key] = self._last_used.pop(previous)
+
+            if len(self._hashes) > self._max_buckets:
+                self._hashes.popitem(last=False)
+
+        self._hashes.move_to_end(bucket)
+
+    def stats(self) -> BucketTableStats:
+        return BucketTableStats(
+            buckets=len(self.buckets),
+            hashes=len(self._hashes),
+            evictions=self._evictions,
+        )
+
+
+class TokenBucketRateLimiter(LocalRateLimiter):
+    """A LocalRateLimiter which allows concurrent requests per bucket, up to
+    the number the bucket has remaining."""
+
+    _lock_type = TokenBucketLock
+
+
+class LocalGlobalRateLimiter:
+    """A token bucket pacing requests under the bot-wide global rate limit.
+
+    Requests to routes exempt from the global limit, such as interaction
+    responses, pass straight through.
+    """
+
+    def __init__(self, rate: int = 50, per: float = 1) -> None:
+        self.rate = rate
+        self.per = per
+
+        self._tokens = float(rate)
+        self._updated = monotonic()
+        self._lock = Lock()
+
+        self._requests = 0
+        self._exempt = 0
+        self._waits = 0
+        self._wait_time = 0.0
+
+    def _take(self) -> bool:
+        now = monotonic()
+
+        self._tokens = min(
+            self.rate, self._tokens + (now - self._updated) * self.rate / self.per
+        )
+        self._updated = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def wait(self, exempt: bool = False) -> None:
+        if exempt:
+            self._exempt += 1
+            return
+
+        self._requests += 1
+
+        if not self._lock.locked() and self._take():
+            return
+
+        start = monotonic()
+
+        async with self._lock:
+            while not self._take():
+                await sleep((1 - self._tokens) * self.per / self.rate)
+
+        self._waits += 1
+        self._wait_time += monotonic() - start
+
+    def stats(self) -> GlobalLimiterStats:
+        return GlobalLimiterStats(
+            requests=self._requests,
+            exempt=self._exempt,
+            waits=self._waits,
+            wait_time=self._wait_time,
+        )
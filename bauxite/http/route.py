@@ -11,12 +11,16 @@ class Route:
         self.webhook_token: Optional[str] = params.get("webhook_token")
 
         self.method = method
+        self.template = path
         self.path = path.format(**params)
 
         self._webhook_bucket: Optional[str] = None
         if self.webhook_id:
             self._webhook_bucket = f"{self.webhook_id}:{self.webhook_token}"
 
-        self.bucket = (
-            f"{self.path}-{self.guild_id}:{self.channel_id}:{self._webhook_bucket}"
+        self.global_exempt = (
+            self.template.startswith("/interactions/") or "interaction_token" in params
         )
+
+        self.major = f"{self.guild_id}:{self.channel_id}:{self._webhook_bucket}"
+        self.bucket = f"{self.method}:{self.template}:{self.major}"
@@ -0,0 +1,170 @@
+from os import replace
+from re import compile
+from typing import Any, AsyncIterator, Optional
+
+from aiohttp import ClientResponse
+
+from bauxite.codec import JSONCodec
+
+_STRUCTURE = compile(rb'[\[\]{}",]')
+_STRING = compile(rb'["\\]')
+
+_OPEN = b"[{"
+_CLOSE = b"]}"
+
+
+class JSONArrayParser:
+    """Splits a top-level JSON array into its items as bytes arrive.
+
+    Only the structure of the array is scanned; each complete item is
+    returned as raw bytes for a JSON codec to decode. The buffer holds at
+    most the item being read plus the last chunk fed.
+    """
+
+    def __init__(self, max_item_size: Optional[int] = None) -> None:
+        self.max_item_size = max_item_size
+        self.done = False
+
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._start: Optional[int] = None
+
+    def _item(self, end: int, items: list[bytes]) -> None:
+        assert self._start is not None, "Array item ended before it started."
+
+        if self.max_item_size and end - self._start > self.max_item_size:
+            raise ValueError("JSON array item exceeds the maximum item size.")
+
+        if item := bytes(self._buffer[self._start : end]).strip():
+            items.append(item)
+
+    def feed(self, data: bytes) -> list[bytes]:
+        if self.done:
+            if data.strip():
+                raise ValueError("Unexpected data after the end of the JSON array.")
+            return []
+
+        buffer = self._buffer
+        buffer += data
+        items: list[bytes] = []
+
+        while self._pos < len(buffer):
+            if self._in_string:
+                if not (match := _STRING.search(buffer, self._pos)):
+                    self._pos = len(buffer)
+                    break
+
+                if buffer[match.start()] == ord("\\"):
+                    if match.end() == len(buffer):
+                        # Wait for the escaped character in the next chunk.
+                        self._pos = match.start()
+                        break
+
+                    self._pos = match.end() + 1
+                    continue
+
+                self._in_string = False
+                self._pos = match.end()
+                continue
+
+            if not (match := _STRUCTURE.search(buffer, self._pos)):
+                self._pos = len(buffer)
+                break
+
+            char = buffer[match.start()]
+
+            if self._depth == 0:
+                if char != ord("[") or buffer[self._pos : match.start()].strip():
+                    raise ValueError("Response body is not a JSON array.")
+
+                self._depth = 1
+                self._start = match.end()
+            elif char == ord('"'):
+                self._in_string = True
+            elif char in _OPEN:
+                self._depth += 1
+            elif char in _CLOSE:
+                self._depth -= 1
+
+                if self._depth == 0:
+                    self._item(match.start(), items)
+                    self._start = None
+                    self.done = True
+
+                    if buffer[match.end() :].strip():
+                        raise ValueError(
+                            "Unexpected data after the end of the JSON array."
+                        )
+
+                    buffer.clear()
+                    self._pos = 0
+
+                    return items
+            elif self._depth == 1:
+                self._item(match.start(), items)
+                self._start = match.end()
+
+            self._pos = match.end()
+
+        cut = self._pos if self._start is None else self._start
+        del buffer[:cut]
+
+        self._pos -= cut
+        if self._start is not None:
+            self._start -= cut
+
+        if self.max_item_size and len(buffer) > self.max_item_size:
+            raise ValueError("JSON array item exceeds the maximum item size.")
+
+        return items
+
+
+async def iter_json_array(
+    response: ClientResponse,
+    codec: JSONCodec,
+    chunk_size: int = 64 * 1024,
+    max_item_size: Optional[int] = None,
+) -> AsyncIterator[Any]:
+    parser = JSONArrayParser(max_item_size)
+
+    try:
+        # A response that was already read, such as a cached one, is parsed
+        # from its body as the stream has been consumed.
+        if response.content.at_eof():
+            for item in parser.feed(await response.read()):
+                yield codec.loads(item)
+        else:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for item in parser.feed(chunk):
+                    yield codec.loads(item)
+    finally:
+        response.release()
+
+    if not parser.done:
+        raise ValueError("Response body ended before the end of the JSON array.")
+
+
+async def save_to_file(
+    response: ClientResponse, path: str, chunk_size: int = 64 * 1024
+) -> int:
+    """Stream a response body to `path`, returning the number of bytes written.
+
+    The body is written to a temporary file first and moved into place once
+    complete, so a failed download never leaves a truncated file at `path`.
+    """
+
+    written = 0
+
+    try:
+        with open(f"{path}.part", "wb") as f:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+    finally:
+        response.release()
+
+    replace(f"{path}.part", path)
+
+    return written
@@ -0,0 +1,106 @@
+from dataclasses import asdict, dataclass
+from json import dumps
+from random import random
+from time import perf_counter, time
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+from aiohttp import ClientSession, TraceConfig
+
+from .route import Route
+
+
+@dataclass
+class RequestSpan:
+    """The phase timings of a single request attempt, in seconds."""
+
+    method: str
+    route: str
+    bucket: str
+    attempt: int
+    started_at: float
+    retry_delay: float = 0
+    global_wait: float = 0
+    acquire: float = 0
+    bucket_wait: float = 0
+    connection_queue: float = 0
+    dns: float = 0
+    connect: float = 0
+    time_to_first_byte: float = 0
+    duration: float = 0
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+SpanSink = Callable[[RequestSpan], None]
+
+
+def _span(ctx: SimpleNamespace) -> Optional[RequestSpan]:
+    return ctx.trace_request_ctx
+
+
+def _mark(name: str):
+    async def mark(session: ClientSession, ctx: SimpleNamespace, params) -> None:
+        setattr(ctx, name, perf_counter())
+
+    return mark
+
+
+def _measure(name: str, since: str):
+    async def measure(session: ClientSession, ctx: SimpleNamespace, params) -> None:
+        if (span := _span(ctx)) and (began := getattr(ctx, since, None)):
+            setattr(span, name, perf_counter() - began)
+
+    return measure
+
+
+class RequestTracer:
+    """Records a `RequestSpan` for each attempt of sampled requests.
+
+    Rate limit waits are timed by the client itself, and connection phases
+    through an aiohttp `TraceConfig`. A `sample_rate` below 1 traces only
+    that fraction of requests, deciding once for all attempts of a request.
+    """
+
+    def __init__(self, sink: SpanSink, sample_rate: float = 1) -> None:
+        self.sink = sink
+        self.sample_rate = sample_rate
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1 or random() < self.sample_rate
+
+    def start(self, route: Route, attempt: int, retry_delay: float) -> RequestSpan:
+        return RequestSpan(
+            route.method, route.template, route.bucket, attempt, time(), retry_delay
+        )
+
+    def finish(self, span: RequestSpan, began: float) -> None:
+        span.duration = perf_counter() - began
+        self.sink(span)
+
+    def trace_config(self) -> TraceConfig:
+        config = TraceConfig()
+
+        config.on_connection_queued_start.append(_mark("queued"))
+        config.on_connection_queued_end.append(_measure("connection_queue", "queued"))
+        config.on_dns_resolvehost_start.append(_mark("resolving"))
+        config.on_dns_resolvehost_end.append(_measure("dns", "resolving"))
+        config.on_connection_create_start.append(_mark("connecting"))
+        config.on_connection_create_end.append(_measure("connect", "connecting"))
+        config.on_request_headers_sent.append(_mark("sent"))
+        config.on_request_end.append(_measure("time_to_first_byte", "sent"))
+
+        return config
+
+
+class JSONLinesSink:
+    """A span sink writing each span as a line of JSON to a file."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", buffering=1)
+
+    def __call__(self, span: RequestSpan) -> None:
+        self._file.write(dumps(asdict(span)) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,242 @@
+from bisect import bisect_left
+from typing import Any, Callable, Optional, Union
+
+from aiohttp import web
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], **extra) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {"labels": dict(zip(self.labels, labels)), "value": value}
+            for labels, value in self._values.items()
+        ]
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {value}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+
+        # Per label set: a count for each bucket plus +Inf, then the sum.
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if (counts := self._values.get(labels)) is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _cumulative(self, counts: list[float]) -> list[float]:
+        total, cumulative = 0, []
+
+        for count in counts[:-1]:
+            total += count
+            cumulative.append(total)
+
+        return cumulative
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        samples = []
+
+        for labels, counts in self._values.items():
+            cumulative = self._cumulative(counts)
+
+            samples.append(
+                {
+                    "labels": dict(zip(self.labels, labels)),
+                    "buckets": dict(zip(self.buckets, cumulative)),
+                    "count": cumulative[-1],
+                    "sum": counts[-1],
+                }
+            )
+
+        return samples
+
+    def render(self) -> list[str]:
+        lines = []
+
+        for labels, counts in self._values.items():
+            cumulative = self._cumulative(counts)
+            bounds = [*map(str, self.buckets), "+Inf"]
+
+            for bound, count in zip(bounds, cumulative):
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labels, labels, le=bound)} {count}"
+                )
+
+            suffix = _format_labels(self.labels, labels)
+
+            lines.append(f"{self.name}_sum{suffix} {counts[-1]}")
+            lines.append(f"{self.name}_count{suffix} {cumulative[-1]}")
+
+        return lines
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """A collection of counters, gauges and histograms.
+
+    Clients only record metrics when given a registry, so instrumentation
+    costs a single attribute check when metrics are disabled.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def _get(self, metric: Metric) -> Any:
+        existing = self._metrics.setdefault(metric.name, metric)
+
+        if type(existing) is not type(metric) or existing.labels != metric.labels:
+            raise ValueError(f"Metric {metric.name} is already registered differently.")
+
+        return existing
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._get(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Add a callback that updates gauges right before they are read."""
+
+        self._collectors.append(collector)
+
+    def _collect(self) -> None:
+        for collector in self._collectors:
+            collector()
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        self._collect()
+
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+
+        self._collect()
+        lines = []
+
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves a registry's metrics over HTTP for Prometheus to scrape."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = "127.0.0.1",
+        port: int = 9090,
+        path: str = "/metrics",
+    ) -> None:
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._path = path
+
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self._registry.render(),
+            content_type="text/plain",
+            headers={"X-Content-Type-Options": "nosniff"},
+        )
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get(self._path, self._handle)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+
+        await web.TCPSite(self._runner, self._host, self._port).start()
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
@@ -0,0 +1,103 @@
+from asyncio import AbstractEventLoop, TimerHandle, get_running_loop
+from heapq import heappop, heappush
+from itertools import count
+from typing import Any, Callable, Optional
+from weakref import WeakKeyDictionary
+
+
+class TimerEntry:
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, callback: Callable[..., Any], args: tuple) -> None:
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """Runs delayed callbacks from a heap driven by a single loop timer.
+
+    This is used by the rate limiters to schedule releases without spawning
+    a task (and a timer handle) for every one of them.
+    """
+
+    def __init__(self, loop: AbstractEventLoop) -> None:
+        self._loop = loop
+
+        self._heap: list[tuple[float, int, TimerEntry]] = []
+        self._ids = count()
+
+        self._handle: Optional[TimerHandle] = None
+        self._armed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _arm(self) -> None:
+        if not self._heap:
+            return
+
+        when = self._heap[0][0]
+
+        if self._handle:
+            if self._armed_at is not None and self._armed_at <= when:
+                return
+            self._handle.cancel()
+
+        self._handle = self._loop.call_at(when, self._run)
+        self._armed_at = when
+
+    def _run(self) -> None:
+        self._handle = None
+        self._armed_at = None
+
+        now = self._loop.time()
+        heap = self._heap
+
+        while heap and heap[0][0] <= now:
+            entry = heappop(heap)[2]
+
+            if entry.cancelled:
+                continue
+
+            try:
+                entry.callback(*entry.args)
+            except Exception as e:
+                self._loop.call_exception_handler(
+                    {"message": "Scheduled timer callback failed.", "exception": e}
+                )
+
+        self._arm()
+
+    def call_at(self, when: float, callback: Callable[..., Any], *args) -> TimerEntry:
+        entry = TimerEntry(when, callback, args)
+        heappush(self._heap, (when, next(self._ids), entry))
+
+        self._arm()
+
+        return entry
+
+    def call_later(
+        self, delay: float, callback: Callable[..., Any], *args
+    ) -> TimerEntry:
+        return self.call_at(self._loop.time() + delay, callback, *args)
+
+
+_schedulers: "WeakKeyDictionary[AbstractEventLoop, TimerScheduler]" = (
+    WeakKeyDictionary()
+)
+
+
+def get_scheduler() -> TimerScheduler:
+    """Get the shared timer scheduler of the running event loop."""
+
+    loop = get_running_loop()
+
+    if (scheduler := _schedulers.get(loop)) is None:
+        scheduler = _schedulers[loop] = TimerScheduler(loop)
+
+    return scheduler
@@ -0,0 +1,63 @@
+"""Compare the plain text gateway path against zlib-stream compression.
+
+Usage: python -m benchmarks.compression [recorded_payloads.jsonl]
+"""
+
+from json import dumps, loads
+from sys import argv
+from time import perf_counter
+from zlib import Z_SYNC_FLUSH, compressobj
+
+from bauxite.gateway.compression import ZlibStream
+
+from .payloads import payloads
+
+
+def text_path(frames: list[str]) -> float:
+    start = perf_counter()
+
+    for frame in frames:
+        loads(frame)
+
+    return perf_counter() - start
+
+
+def zlib_path(frames: list[bytes]) -> float:
+    stream = ZlibStream()
+    start = perf_counter()
+
+    for frame in frames:
+        payload = stream.feed(frame)
+
+        assert payload is not None
+        loads(payload)
+
+    return perf_counter() - start
+
+
+def main() -> None:
+    data = payloads(argv[1] if len(argv) > 1 else None)
+
+    text_frames = [dumps(payload, separators=(",", ":")) for payload in data]
+
+    compressor = compressobj()
+    zlib_frames = [
+        compressor.compress(frame.encode()) + compressor.flush(Z_SYNC_FLUSH)
+        for frame in text_frames
+    ]
+
+    text_bytes = sum(len(frame.encode()) for frame in text_frames)
+    zlib_bytes = sum(len(frame) for frame in zlib_frames)
+
+    text_time = min(text_path(text_frames) for _ in range(5))
+    zlib_time = min(zlib_path(zlib_frames) for _ in range(5))
+
+    print(f"payloads:       {len(data)}")
+    print(f"text bytes:     {text_bytes:>12,}")
+    print(f"zlib bytes:     {zlib_bytes:>12,} ({zlib_bytes / text_bytes:.1%})")
+    print(f"text decode:    {text_time * 1000:>9.2f}ms")
+    print(f"zlib decode:    {zlib_time * 1000:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
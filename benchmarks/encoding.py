@@ -0,0 +1,60 @@
+"""Compare JSON and ETF gateway payload size and decode time.
+
+Usage: python -m benchmarks.encoding [recorded_payloads.jsonl]
+"""
+
+from json import dumps, loads
+from sys import argv
+from time import perf_counter
+from typing import Any, Callable
+
+from bauxite.gateway import etf
+
+from .payloads import payloads
+
+
+def _etf_shaped(value: Any, key: str = "") -> Any:
+    # Discord sends snowflakes as integers over ETF rather than strings.
+    if isinstance(value, dict):
+        return {k: _etf_shaped(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_etf_shaped(v, key) for v in value]
+    if (
+        isinstance(value, str)
+        and value.isdigit()
+        and (key == "id" or key.endswith("_id") or key == "roles")
+    ):
+        return int(value)
+    return value
+
+
+def measure(decode: Callable[[Any], Any], frames: list) -> float:
+    start = perf_counter()
+
+    for frame in frames:
+        decode(frame)
+
+    return perf_counter() - start
+
+
+def main() -> None:
+    data = payloads(argv[1] if len(argv) > 1 else None)
+
+    json_frames = [dumps(payload, separators=(",", ":")) for payload in data]
+    etf_frames = [etf.encode(_etf_shaped(payload)) for payload in data]
+
+    json_bytes = sum(len(frame.encode()) for frame in json_frames)
+    etf_bytes = sum(len(frame) for frame in etf_frames)
+
+    json_time = min(measure(loads, json_frames) for _ in range(5))
+    etf_time = min(measure(etf.decode, etf_frames) for _ in range(5))
+
+    print(f"payloads:       {len(data)}")
+    print(f"json bytes:     {json_bytes:>12,}")
+    print(f"etf bytes:      {etf_bytes:>12,} ({etf_bytes / json_bytes:.1%})")
+    print(f"json decode:    {json_time * 1000:>9.2f}ms")
+    print(f"etf decode:     {etf_time * 1000:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""A local stand-in for the Discord gateway, speaking just enough of the
+protocol (JSON encoding, no compression) for shards to connect and identify.
+
+After READY, each connection is sent `events` at `dispatch_rate` events per
+second (or as fast as possible when it is 0), and the send time of every
+event is kept in `sent_at` so clients can measure their dispatch latency.
+"""
+
+from asyncio import Task, create_task, sleep
+from itertools import count
+from time import perf_counter
+from typing import Optional
+
+from aiohttp import WSMsgType, web
+
+from bauxite.codec import default_codec
+
+
+class FakeGateway:
+    def __init__(
+        self,
+        heartbeat_interval: int = 41250,
+        ready_delay: float = 0,
+        events: Optional[list[dict]] = None,
+        dispatch_rate: float = 0,
+    ) -> None:
+        self.heartbeat_interval = heartbeat_interval
+        self.ready_delay = ready_delay
+        self.dispatch_rate = dispatch_rate
+
+        self.url = ""
+        self.identifies: list[tuple[float, int]] = []
+        self.sent_at: dict[int, list[float]] = {}
+
+        self._codec = default_codec()
+
+        # READY is sequence 1, so the stream is pre-encoded from sequence 2.
+        self._stream = [
+            self._codec.dumps({**event, "s": seq}).decode()
+            for seq, event in enumerate(events or [], 2)
+        ]
+        self._sessions = count()
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _send(self, ws: web.WebSocketResponse, payload: dict) -> None:
+        await ws.send_str(self._codec.dumps(payload).decode())
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        await self._send(
+            ws, {"op": 10, "d": {"heartbeat_interval": self.heartbeat_interval}}
+        )
+
+        replay: Optional[Task] = None
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+
+            payload = self._codec.loads(message.data)
+            op = payload["op"]
+
+            if op == 1:
+                await self._send(ws, {"op": 11})
+            elif op == 2:
+                shard_id = payload["d"]["shard"][0]
+                self.identifies.append((perf_counter(), shard_id))
+
+                await sleep(self.ready_delay)
+
+                await self._send(
+                    ws,
+                    {
+                        "op": 0,
+                        "t": "READY",
+                        "s": 1,
+                        "d": {
+                            "session_id": f"session-{next(self._sessions)}",
+                            "resume_gateway_url": self.url,
+                            "shard": payload["d"]["shard"],
+                        },
+                    },
+                )
+
+                if self._stream:
+                    replay = create_task(self._replay(ws, shard_id))
+            elif op == 6:
+                await self._send(ws, {"op": 0, "t": "RESUMED", "s": None, "d": {}})
+
+        if replay:
+            replay.cancel()
+
+        return ws
+
+    async def _replay(self, ws: web.WebSocketResponse, shard_id: int) -> None:
+        sent = self.sent_at[shard_id] = []
+        began = perf_counter()
+
+        for i, frame in enumerate(self._stream):
+            if self.dispatch_rate:
+                await sleep(began + i / self.dispatch_rate - perf_counter())
+
+            sent.append(perf_counter())
+            await ws.send_str(frame)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/", self._handle)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound = self._runner.addresses[0]
+        self.url = f"ws://{bound[0]}:{bound[1]}/"
+
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
@@ -0,0 +1,126 @@
+"""A local stand-in for the Discord REST API.
+
+Every method and path is its own bucket of `limit` requests per `reset_after`
+seconds, reported through `X-RateLimit-*` headers. Requests beyond a bucket's
+limit, or beyond `global_rate` requests per second overall, get a 429 shaped
+like Discord's.
+"""
+
+from asyncio import sleep
+from hashlib import sha1
+from time import monotonic
+from typing import Optional
+
+from aiohttp import web
+
+from bauxite.codec import default_codec
+
+
+class FakeREST:
+    def __init__(
+        self,
+        limit: int = 5,
+        reset_after: float = 1,
+        global_rate: int = 50,
+        latency: float = 0,
+    ) -> None:
+        self.limit = limit
+        self.reset_after = reset_after
+        self.global_rate = global_rate
+        self.latency = latency
+
+        self.url = ""
+
+        self.requests = 0
+        self.ratelimited = 0
+        self.global_ratelimited = 0
+
+        self._codec = default_codec()
+        self._buckets: dict[str, list[float]] = {}
+        self._window = (0.0, 0)
+        self._runner: Optional[web.AppRunner] = None
+
+    def _json(self, status: int, body: dict, headers: dict) -> web.Response:
+        return web.Response(
+            status=status,
+            body=self._codec.dumps(body),
+            headers={**headers, "Content-Type": "application/json", "Via": "1.1"},
+        )
+
+    def _too_many(self, retry_after: float, is_global: bool) -> web.Response:
+        headers = {"Retry-After": str(retry_after)}
+
+        if is_global:
+            self.global_ratelimited += 1
+            headers["X-RateLimit-Global"] = "true"
+        else:
+            self.ratelimited += 1
+
+        return self._json(
+            429,
+            {
+                "message": "You are being rate limited.",
+                "retry_after": retry_after,
+                "global": is_global,
+            },
+            headers,
+        )
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if self.latency:
+            await sleep(self.latency)
+
+        self.requests += 1
+        now = monotonic()
+
+        started, count = self._window
+        if now - started >= 1:
+            started, count = now, 0
+
+        if count >= self.global_rate:
+            return self._too_many(round(started + 1 - now, 3), True)
+
+        self._window = (started, count + 1)
+
+        key = f"{request.method} {request.path}"
+        bucket = self._buckets.setdefault(key, [self.limit, now + self.reset_after])
+
+        if now >= bucket[1]:
+            bucket[0], bucket[1] = self.limit, now + self.reset_after
+
+        reset_after = round(bucket[1] - now, 3)
+
+        if bucket[0] <= 0:
+            return self._too_many(reset_after, False)
+
+        bucket[0] -= 1
+
+        return self._json(
+            200,
+            {"id": "175928847299117063", "path": request.path},
+            {
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Remaining": str(int(bucket[0])),
+                "X-RateLimit-Reset-After": str(reset_after),
+                "X-RateLimit-Bucket": sha1(key.encode()).hexdigest()[:16],
+            },
+        )
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound = self._runner.addresses[0]
+        self.url = f"http://{bound[0]}:{bound[1]}"
+
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
@@ -0,0 +1,97 @@
+"""Measure bucket acquire latency under contention for the local and
+cross-process HTTP rate limiters.
+
+Usage: python -m benchmarks.ipc_ratelimit [clients] [tasks_per_client] [buckets]
+"""
+
+from asyncio import gather, run, sleep
+from multiprocessing import Event, Process
+from os import getpid, path
+from sys import argv
+from tempfile import gettempdir
+from time import perf_counter
+
+from bauxite.http import IPCRateLimiter, LocalRateLimiter, RateLimiter, RateLimitServer
+
+ACQUIRES = 200
+
+
+def _serve(socket_path: str, ready) -> None:
+    async def serve() -> None:
+        server = RateLimitServer(socket_path)
+        await server.start()
+        ready.set()
+
+        while True:
+            await sleep(3600)
+
+    run(serve())
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def contend(limiters: list[RateLimiter], tasks: int, buckets: int) -> list[float]:
+    samples: list[float] = []
+
+    async def worker(limiter: RateLimiter, n: int) -> None:
+        for i in range(ACQUIRES):
+            lock = await limiter.acquire(f"bucket-{(n + i) % buckets}")
+
+            start = perf_counter()
+            async with lock:
+                samples.append(perf_counter() - start)
+                await lock.release(0)
+
+    await gather(
+        *(
+            worker(limiter, i * tasks + n)
+            for i, limiter in enumerate(limiters)
+            for n in range(tasks)
+        )
+    )
+
+    return samples
+
+
+def report(name: str, samples: list[float]) -> None:
+    print(
+        f"{name:<6} acquires={len(samples):>6} "
+        f"p50={percentile(samples, 0.5) * 1e6:>8.1f}us "
+        f"p99={percentile(samples, 0.99) * 1e6:>8.1f}us"
+    )
+
+
+async def main(clients: int, tasks: int, buckets: int, socket_path: str) -> None:
+    print("uncontended:")
+    report("local", await contend([LocalRateLimiter()], 1, buckets))
+
+    single = IPCRateLimiter(socket_path)
+    report("ipc", await contend([single], 1, buckets))
+    await single.close()
+
+    print(f"contended ({clients} clients x {tasks} tasks, {buckets} buckets):")
+    report("local", await contend([LocalRateLimiter()], clients * tasks, buckets))
+
+    limiters = [IPCRateLimiter(socket_path) for _ in range(clients)]
+    report("ipc", await contend(limiters, tasks, buckets))
+
+    for limiter in limiters:
+        await limiter.close()
+
+
+if __name__ == "__main__":
+    clients, tasks, buckets = (int(arg) for arg in (argv[1:] + ["4", "16", "32"])[:3])
+    socket_path = path.join(gettempdir(), f"bauxite-bench-{getpid()}.sock")
+
+    ready = Event()
+    server = Process(target=_serve, args=(socket_path, ready), daemon=True)
+    server.start()
+    ready.wait()
+
+    try:
+        run(main(clients, tasks, buckets, socket_path))
+    finally:
+        server.terminate()
@@ -0,0 +1,152 @@
+from json import loads
+from random import Random
+from typing import Iterator, Optional
+
+SNOWFLAKE_BASE = 175928847299117063
+
+
+def _snowflake(rng: Random) -> str:
+    return str(SNOWFLAKE_BASE + rng.randrange(1 << 40))
+
+
+def _member(rng: Random) -> dict:
+    user_id = _snowflake(rng)
+
+    return {
+        "user": {
+            "id": user_id,
+            "username": f"user{rng.randrange(100000)}",
+            "discriminator": f"{rng.randrange(10000):04}",
+            "avatar": None,
+            "public_flags": 0,
+        },
+        "roles": [_snowflake(rng) for _ in range(rng.randrange(4))],
+        "nick": None,
+        "joined_at": "2021-06-20T13:37:00.000000+00:00",
+        "deaf": False,
+        "mute": False,
+    }
+
+
+def _channel(rng: Random, guild_id: str, position: int) -> dict:
+    return {
+        "id": _snowflake(rng),
+        "guild_id": guild_id,
+        "type": 0,
+        "name": f"channel-{position}",
+        "position": position,
+        "topic": None,
+        "nsfw": False,
+        "last_message_id": _snowflake(rng),
+        "permission_overwrites": [
+            {"id": _snowflake(rng), "type": 0, "allow": "1024", "deny": "0"}
+        ],
+    }
+
+
+def guild_create(rng: Random, members: int = 250, channels: int = 40) -> dict:
+    guild_id = _snowflake(rng)
+
+    return {
+        "op": 0,
+        "t": "GUILD_CREATE",
+        "s": 2,
+        "d": {
+            "id": guild_id,
+            "name": "Benchmark Guild",
+            "icon": None,
+            "owner_id": _snowflake(rng),
+            "member_count": members,
+            "large": members > 250,
+            "roles": [
+                {
+                    "id": _snowflake(rng),
+                    "name": f"role-{i}",
+                    "color": rng.randrange(1 << 24),
+                    "position": i,
+                    "permissions": "104324673",
+                    "hoist": False,
+                    "managed": False,
+                    "mentionable": False,
+                }
+                for i in range(20)
+            ],
+            "channels": [_channel(rng, guild_id, i) for i in range(channels)],
+            "members": [_member(rng) for _ in range(members)],
+            "presences": [],
+            "voice_states": [],
+        },
+    }
+
+
+def message_create(rng: Random) -> dict:
+    return {
+        "op": 0,
+        "t": "MESSAGE_CREATE",
+        "s": 3,
+        "d": {
+            "id": _snowflake(rng),
+            "channel_id": _snowflake(rng),
+            "guild_id": _snowflake(rng),
+            "author": _member(rng)["user"],
+            "member": _member(rng),
+            "content": "hello " * rng.randrange(1, 20),
+            "timestamp": "2021-06-20T13:37:00.000000+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        },
+    }
+
+
+def typing_start(rng: Random) -> dict:
+    return {
+        "op": 0,
+        "t": "TYPING_START",
+        "s": 4,
+        "d": {
+            "user_id": _snowflake(rng),
+            "channel_id": _snowflake(rng),
+            "guild_id": _snowflake(rng),
+            "timestamp": 1624196220,
+            "member": _member(rng),
+        },
+    }
+
+
+def generate(count: int, seed: int = 0) -> list[dict]:
+    """Generate a dispatch stream shaped like a freshly connected shard."""
+
+    rng = Random(seed)
+    payloads = []
+
+    for i in range(count):
+        if i < count // 20:
+            payloads.append(guild_create(rng))
+        elif i % 3:
+            payloads.append(message_create(rng))
+        else:
+            payloads.append(typing_start(rng))
+
+    return payloads
+
+
+def load(path: str) -> Iterator[dict]:
+    """Load recorded payloads from a file of JSON lines."""
+
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def payloads(path: Optional[str] = None, count: int = 1000) -> list[dict]:
+    if path:
+        return list(load(path))
+    return generate(count)
@@ -0,0 +1,70 @@
+"""Measure the time for every shard to reach READY against a local fake
+gateway. Identify intervals are scaled down from Discord's 5 seconds so the
+run finishes quickly; the ideal time is shards / max_concurrency intervals.
+
+Usage: python -m benchmarks.startup [shards] [max_concurrency] [interval]
+"""
+
+from asyncio import create_task, run, sleep
+from resource import RLIMIT_NOFILE, getrlimit, setrlimit
+from sys import argv
+from time import perf_counter
+
+from bauxite import GatewayClient, HTTPClient
+
+from .fake_gateway import FakeGateway
+
+
+async def main(shards: int, max_concurrency: int, interval: float) -> None:
+    # Each shard holds a client and a server socket in this process.
+    setrlimit(RLIMIT_NOFILE, (getrlimit(RLIMIT_NOFILE)[1],) * 2)
+
+    gateway = FakeGateway(ready_delay=interval / 10)
+    url = await gateway.start()
+
+    http = HTTPClient("token")
+    client = GatewayClient(
+        http,
+        0,
+        gateway={
+            "url": url,
+            "shards": shards,
+            "session_start_limit": {"max_concurrency": max_concurrency},
+        },
+        identify_interval=interval,
+        centralized_heartbeats=True,
+    )
+
+    began = perf_counter()
+    task = create_task(client.spawn_shards())
+
+    while client.startup_progress()[0] < shards:
+        if task.done():
+            task.result()
+
+        await sleep(0.01)
+
+    elapsed = perf_counter() - began
+    ideal = -(-shards // max_concurrency) * interval
+
+    print(
+        f"shards={shards} max_concurrency={max_concurrency} interval={interval}s "
+        f"all-ready={elapsed:.2f}s ideal={ideal:.2f}s "
+        f"identifies={len(gateway.identifies)}"
+    )
+
+    await client.close()
+    task.cancel()
+
+    await http.close()
+    await gateway.close()
+
+
+if __name__ == "__main__":
+    run(
+        main(
+            int(argv[1]) if len(argv) > 1 else 1000,
+            int(argv[2]) if len(argv) > 2 else 16,
+            float(argv[3]) if len(argv) > 3 else 0.05,
+        )
+    )
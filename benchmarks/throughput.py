@@ -0,0 +1,137 @@
+"""Measure gateway and REST throughput against the local fake Discord servers.
+
+Usage:
+    python -m benchmarks.throughput gateway [shards] [events] [rate]
+    python -m benchmarks.throughput rest [requests] [buckets] [concurrency]
+"""
+
+from asyncio import Event, create_task, gather, run
+from sys import argv
+from time import perf_counter
+
+from bauxite import EventDirection, GatewayClient, HTTPClient, HTTPError, Route, Shard
+from bauxite.gateway.payload import Payload
+
+from .fake_gateway import FakeGateway
+from .fake_rest import FakeREST
+from .ipc_ratelimit import percentile
+from .payloads import payloads
+
+
+def report(name: str, count: int, elapsed: float, samples: list[float]) -> None:
+    print(
+        f"{name:<8} count={count} elapsed={elapsed:.2f}s "
+        f"rate={count / elapsed:.0f}/s "
+        f"p50={percentile(samples, 0.5) * 1e3:.2f}ms "
+        f"p99={percentile(samples, 0.99) * 1e3:.2f}ms"
+    )
+
+
+async def gateway(shards: int, events: int, rate: float) -> None:
+    server = FakeGateway(events=payloads(count=events), dispatch_rate=rate)
+    url = await server.start()
+
+    samples: list[float] = []
+    received = [0]
+    done = Event()
+
+    async def on_event(shard: Shard, direction: EventDirection, data: Payload) -> None:
+        if direction != EventDirection.INBOUND or data["op"]:
+            return
+        if data["t"] in ("READY", "RESUMED"):
+            return
+
+        samples.append(perf_counter() - server.sent_at[shard.id][data["s"] - 2])
+        received[0] += 1
+
+        if received[0] == shards * events:
+            done.set()
+
+    http = HTTPClient("token")
+    client = GatewayClient(
+        http,
+        0,
+        shard_count=shards,
+        callbacks=[on_event],
+        gateway={
+            "url": url,
+            "shards": shards,
+            "session_start_limit": {"max_concurrency": shards},
+        },
+        identify_interval=0,
+    )
+
+    task = create_task(client.spawn_shards())
+    began = perf_counter()
+
+    await done.wait()
+    elapsed = perf_counter() - began
+
+    report("gateway", received[0], elapsed, samples)
+    print(f"{'':<8} per-shard={received[0] / elapsed / shards:.0f}/s")
+
+    await client.close()
+    task.cancel()
+
+    await http.close()
+    await server.close()
+
+
+async def rest(requests: int, buckets: int, concurrency: int) -> None:
+    server = FakeREST()
+    url = await server.start()
+
+    http = HTTPClient("token", api_url=url)
+
+    samples: list[float] = []
+    failed = [0]
+
+    async def worker(n: int) -> None:
+        for i in range(n, requests, concurrency):
+            route = Route(
+                "GET", "/channels/{channel_id}/messages", channel_id=i % buckets
+            )
+
+            start = perf_counter()
+            try:
+                await http.request(route)
+            except HTTPError:
+                failed[0] += 1
+            samples.append(perf_counter() - start)
+
+    began = perf_counter()
+    await gather(*(worker(n) for n in range(concurrency)))
+    elapsed = perf_counter() - began
+
+    report("rest", requests, elapsed, samples)
+    limited = server.ratelimited + server.global_ratelimited
+
+    print(
+        f"{'':<8} server-requests={server.requests} "
+        f"429-rate={limited / server.requests:.2%} "
+        f"global-429s={server.global_ratelimited} failed={failed[0]}"
+    )
+
+    await http.close()
+    await server.close()
+
+
+if __name__ == "__main__":
+    scenario, args = argv[1] if len(argv) > 1 else "rest", argv[2:]
+
+    if scenario == "gateway":
+        run(
+            gateway(
+                int(args[0]) if len(args) > 0 else 4,
+                int(args[1]) if len(args) > 1 else 10_000,
+                float(args[2]) if len(args) > 2 else 0,
+            )
+        )
+    else:
+        run(
+            rest(
+                int(args[0]) if len(args) > 0 else 1000,
+                int(args[1]) if len(args) > 1 else 50,
+                int(args[2]) if len(args) > 2 else 32,
+            )
+        )
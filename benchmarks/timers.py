@@ -0,0 +1,76 @@
+"""Compare scheduling rate limiter releases with a task per release against
+the shared timer scheduler.
+
+Usage: python -m benchmarks.timers [waiters]
+"""
+
+from asyncio import Event, create_task, run, sleep
+from sys import argv
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+
+from bauxite.timer import get_scheduler
+
+DELAY = 0.2
+
+
+async def _release_after(delay: float, done: list[int], finished: Event) -> None:
+    await sleep(delay)
+    _release(done, finished)
+
+
+def _release(done: list[int], finished: Event) -> None:
+    done[0] -= 1
+
+    if not done[0]:
+        finished.set()
+
+
+async def with_tasks(waiters: int) -> tuple[float, int]:
+    done, finished = [waiters], Event()
+
+    start()
+    began = perf_counter()
+
+    for _ in range(waiters):
+        create_task(_release_after(DELAY, done, finished))
+
+    elapsed = perf_counter() - began
+    memory = get_traced_memory()[0]
+    stop()
+
+    await finished.wait()
+    return elapsed, memory
+
+
+async def with_scheduler(waiters: int) -> tuple[float, int]:
+    done, finished = [waiters], Event()
+    scheduler = get_scheduler()
+
+    start()
+    began = perf_counter()
+
+    for _ in range(waiters):
+        scheduler.call_later(DELAY, _release, done, finished)
+
+    elapsed = perf_counter() - began
+    memory = get_traced_memory()[0]
+    stop()
+
+    await finished.wait()
+    return elapsed, memory
+
+
+async def main(waiters: int) -> None:
+    for name, bench in (("tasks", with_tasks), ("scheduler", with_scheduler)):
+        elapsed, memory = await bench(waiters)
+
+        print(
+            f"{name:<10} waiters={waiters} "
+            f"per-acquire={elapsed / waiters * 1e6:.2f}us "
+            f"memory={memory / 1024:.0f}KiB"
+        )
+
+
+if __name__ == "__main__":
+    run(main(int(argv[1]) if len(argv) > 1 else 10_000))